@@ -4,6 +4,8 @@ class FansChart {
         this.data = [];
         this.linearModel = null;
         this.exponentialModel = null;
+        this.forecastGrid = null;
+        this.milestones = [];
     }
 
     async init() {
@@ -14,12 +16,16 @@ class FansChart {
             this.loadData();
             console.log('数据加载完成');
             
-            // 计算模型
-            this.calculateLinearRegression();
-            console.log('线性回归计算完成');
-            
-            this.calculateExponentialDecay();
-            console.log('指数衰减计算完成');
+            // 优先使用data.js中预计算的模型，缺失时在浏览器中拟合
+            if (this.loadPrecomputedModels()) {
+                console.log('使用预计算模型');
+            } else {
+                this.calculateLinearRegression();
+                console.log('线性回归计算完成');
+                
+                this.calculateExponentialDecay();
+                console.log('指数衰减计算完成');
+            }
             
             // 创建图表
             this.createChart();
@@ -101,6 +107,62 @@ class FansChart {
         }
     }
 
+    // 读取convert_data.py --models生成的MODEL_DATA，只需构建预测函数
+    loadPrecomputedModels() {
+        if (typeof MODEL_DATA === 'undefined' || !MODEL_DATA) {
+            return false;
+        }
+
+        try {
+            const { startTime, linear, exponential, forecast, milestones } = MODEL_DATA;
+            const msPerDay = 1000 * 60 * 60 * 24;
+
+            if (linear) {
+                const { slope, intercept } = linear;
+                this.linearModel = {
+                    ...linear,
+                    startTime,
+                    predict: (timestamp) => {
+                        const days = (timestamp - startTime) / msPerDay;
+                        return Math.max(0, slope * days + intercept);
+                    }
+                };
+            }
+
+            if (exponential) {
+                const { a, lam, c } = exponential;
+                this.exponentialModel = {
+                    ...exponential,
+                    startTime,
+                    predict: (timestamp) => {
+                        const days = (timestamp - startTime) / msPerDay;
+                        return Math.max(0, a * Math.exp(-lam * days) + c);
+                    }
+                };
+            }
+
+            // 预测网格按列存储：time 与各模型的均值/区间数组一一对应
+            this.forecastGrid = forecast || null;
+            this.milestones = milestones || [];
+
+            console.log('预计算模型:', { linear: this.linearModel, exponential: this.exponentialModel });
+            return Boolean(this.linearModel || this.exponentialModel);
+        } catch (error) {
+            console.error('读取预计算模型失败:', error);
+            this.linearModel = null;
+            this.exponentialModel = null;
+            this.forecastGrid = null;
+            this.milestones = [];
+            return false;
+        }
+    }
+
+    // 预计算的里程碑到达时间（method为'linear'或'exponential'），没有对应里程碑时返回null
+    milestoneTime(method, fans) {
+        const milestone = this.milestones.find(m => Math.abs(m.fans - fans) < 1e-9);
+        return milestone && milestone[method] != null ? milestone[method] : null;
+    }
+
     calculateLinearRegression() {
         if (this.data.length < 2) {
             console.warn('数据点不足，无法计算线性回归');
@@ -429,18 +491,52 @@ class FansChart {
             this.chart.destroy();
         }
         
+        const datasets = [{
+            label: '实际粉丝数',
+            data: fansData,
+            borderColor: 'rgb(75, 192, 192)',
+            tension: 0.1,
+            fill: false
+        }];
+        
+        // 预计算的线性/指数衰减预测及95%区间
+        const grid = this.forecastGrid;
+        const forecastStyles = [
+            { key: 'linear', label: '线性回归', color: '54, 162, 235' },
+            { key: 'exponential', label: '指数衰减', color: '255, 99, 132' }
+        ];
+        forecastStyles.forEach(({ key, label, color }) => {
+            if (!grid || !grid[key]) return;
+            const toPoints = (values) => grid.time.map((t, i) => ({ x: t, y: values[i] }));
+            datasets.push({
+                label: `${label}预测区间下限`,
+                data: toPoints(grid[`${key}Lower`]),
+                borderColor: `rgba(${color}, 0.2)`,
+                pointRadius: 0,
+                fill: false
+            }, {
+                label: `${label}预测区间上限`,
+                data: toPoints(grid[`${key}Upper`]),
+                borderColor: `rgba(${color}, 0.2)`,
+                backgroundColor: `rgba(${color}, 0.1)`,
+                pointRadius: 0,
+                fill: '-1'
+            }, {
+                label: `${label}预测`,
+                data: toPoints(grid[key]),
+                borderColor: `rgb(${color})`,
+                borderDash: [6, 4],
+                pointRadius: 0,
+                fill: false
+            });
+        });
+        
         // 创建新图表
         this.chart = new Chart(ctx, {
             type: 'line',
             data: {
                 labels: labels,
-                datasets: [{
-                    label: '实际粉丝数',
-                    data: fansData,
-                    borderColor: 'rgb(75, 192, 192)',
-                    tension: 0.1,
-                    fill: false
-                }]
+                datasets: datasets
             },
             options: {
                 responsive: true,
@@ -275,6 +275,10 @@ class FansPredictionSystem {
     reversePredictLinear(targetFans) {
         if (!this.chart.linearModel) return null;
         
+        // 优先使用data.js中预计算的里程碑时间
+        const precomputed = this.chart.milestoneTime('linear', targetFans);
+        if (precomputed !== null) return new Date(precomputed);
+        
         const { slope, intercept, startTime } = this.chart.linearModel;
         if (slope === 0) return null;
         
@@ -288,12 +292,16 @@ class FansPredictionSystem {
     reversePredictExponential(targetFans) {
         if (!this.chart.exponentialModel) return null;
         
+        const precomputed = this.chart.milestoneTime('exponential', targetFans);
+        if (precomputed !== null) return new Date(precomputed);
+        
         const { a, lam, c, startTime } = this.chart.exponentialModel;
         if (lam <= 0) return null;
         
         // 解方程式: targetFans = a*e^(-λt) + c
+        // 目标不高于渐近线c时永远达不到；已经过去的时间由调用方提示
         const value = targetFans - c;
-        if (value <= 0 || value > a * 2) return null; // 超出合理范围
+        if (value <= 0) return null;
         
         const days = -Math.log(value / a) / lam;
         const timestamp = startTime + days * 24 * 60 * 60 * 1000;
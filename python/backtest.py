@@ -0,0 +1,155 @@
+import argparse
+import csv
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from forecast_models import MODEL_FUNCS, load_series, fit_model
+
+warnings.filterwarnings('ignore')
+
+DEFAULT_HORIZONS = [1, 6, 24]  # 预测步长（小时）
+
+def make_origins(hours, min_train_hours=24, step_hours=1):
+    """生成滚动预测起点：训练集至少覆盖min_train_hours，起点之后至少还有一个测试点"""
+    return np.arange(hours[0] + min_train_hours, hours[-1], step_hours)
+
+def run_folds(fit_type, hours, values, origins, horizons, degree=3):
+    """按时间顺序执行一组连续的滚动预测，后一折用前一折的参数热启动
+
+    步长h的误差只统计提前量落在 (上一个步长, h] 区间内的测试点（第一个步长为 (0, h]），
+    例如步长1,6,24分别对应提前 0-1、1-6、6-24 小时，各列互不重叠，可以直接比较。
+    返回 (各步长的绝对误差列表, 各步长的百分比误差列表, 拟合耗时, 失败次数)
+    """
+    max_horizon = max(horizons)
+    abs_errors = {h: [] for h in horizons}
+    pct_errors = {h: [] for h in horizons}
+    fit_seconds = 0.0
+    failures = 0
+    params = None
+
+    for origin in origins:
+        train_end = np.searchsorted(hours, origin, side='right')
+        test_end = np.searchsorted(hours, origin + max_horizon, side='right')
+        if train_end < 3 or test_end <= train_end:
+            continue
+
+        start = time.perf_counter()
+        try:
+            func, params = fit_model(fit_type, hours[:train_end], values[:train_end],
+                                     degree=degree, p0=params)
+        except Exception:
+            failures += 1
+            params = None  # 拟合失败后下一折重新使用默认初值
+            continue
+        finally:
+            fit_seconds += time.perf_counter() - start
+
+        test_hours = hours[train_end:test_end]
+        test_values = values[train_end:test_end]
+        with np.errstate(all='ignore'):
+            predicted = func(test_hours, *params)
+        errors = np.abs(predicted - test_values)
+        lead = test_hours - origin
+
+        # 按提前量区间 (上一个步长, h] 分桶
+        previous = 0.0
+        for h in sorted(horizons):
+            within = (lead > previous) & (lead <= h) & np.isfinite(errors)
+            previous = h
+            abs_errors[h].extend(errors[within])
+            pct_errors[h].extend(errors[within] / np.abs(test_values[within]) * 100)
+
+    return abs_errors, pct_errors, fit_seconds, failures
+
+def _run_task(task):
+    fit_type, hours, values, origins, horizons, degree = task
+    return fit_type, run_folds(fit_type, hours, values, origins, horizons, degree)
+
+def backtest(data, models=None, horizons=DEFAULT_HORIZONS, min_train_hours=24,
+             step_hours=1, blocks=4, workers=None, degree=3):
+    """对所有模型做滚动起点回测
+
+    每个模型的预测起点被切分为blocks段连续区间，分别在进程池中执行；
+    同一段内的各折依次热启动。返回 ({模型: {'mae', 'mape', 'count', 'fit_seconds', 'failures'}}, 起点数)
+    """
+    models = models or list(MODEL_FUNCS)
+    hours = data['hours'].values.astype(float)
+    values = data['value'].values.astype(float)
+    origins = make_origins(hours, min_train_hours, step_hours)
+
+    tasks = [(fit_type, hours, values, block, horizons, degree)
+             for fit_type in models
+             for block in np.array_split(origins, min(blocks, max(len(origins), 1)))
+             if len(block)]
+
+    merged = {fit_type: ({h: [] for h in horizons}, {h: [] for h in horizons}, 0.0, 0)
+              for fit_type in models}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for fit_type, (abs_errors, pct_errors, fit_seconds, failures) in executor.map(_run_task, tasks):
+            all_abs, all_pct, total_seconds, total_failures = merged[fit_type]
+            for h in horizons:
+                all_abs[h].extend(abs_errors[h])
+                all_pct[h].extend(pct_errors[h])
+            merged[fit_type] = (all_abs, all_pct, total_seconds + fit_seconds, total_failures + failures)
+
+    results = {}
+    for fit_type, (all_abs, all_pct, fit_seconds, failures) in merged.items():
+        results[fit_type] = {
+            'mae': {h: float(np.mean(all_abs[h])) if all_abs[h] else float('nan') for h in horizons},
+            'mape': {h: float(np.mean(all_pct[h])) if all_pct[h] else float('nan') for h in horizons},
+            'count': {h: len(all_abs[h]) for h in horizons},
+            'fit_seconds': fit_seconds,
+            'failures': failures,
+        }
+    return results, len(origins)
+
+def main():
+    parser = argparse.ArgumentParser(description='预测模型滚动起点回测')
+    parser.add_argument('--data', default='filtered_comments_cleaned.txt', help='时间序列数据文件')
+    parser.add_argument('--horizons', default='1,6,24', help='预测步长（小时），逗号分隔；每个步长统计提前量在上一步长到该步长之间的测试点')
+    parser.add_argument('--min-train', type=float, default=24, help='最少训练时长（小时）')
+    parser.add_argument('--step', type=float, default=1, help='预测起点间隔（小时）')
+    parser.add_argument('--models', help='参与回测的模型，逗号分隔，默认全部')
+    parser.add_argument('--degree', type=int, default=3, help='多项式阶数')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='并行进程数')
+    # 输出不用.csv后缀，避免被各脚本的 glob('*.csv') 当作评论数据读入
+    parser.add_argument('--output', default='backtest_results.tsv', help='结果输出文件（制表符分隔）')
+    args = parser.parse_args()
+
+    horizons = [float(h) for h in args.horizons.split(',')]
+    models = args.models.split(',') if args.models else None
+
+    data = load_series(args.data)
+    print(f"数据点: {len(data)} 个, 时间跨度 {data['hours'].iloc[-1]:.1f} 小时")
+
+    start = time.perf_counter()
+    results, num_origins = backtest(data, models, horizons, args.min_train, args.step,
+                                    blocks=args.workers, workers=args.workers, degree=args.degree)
+    print(f"预测起点: {num_origins} 个, 总耗时 {time.perf_counter() - start:.2f} 秒\n")
+
+    header = f"{'模型':<20}" + ''.join(f"{f'MAE@{h:g}h':>12}{f'MAPE@{h:g}h':>12}" for h in horizons)
+    print(header + f"{'拟合耗时':>10}{'失败':>6}")
+    # 按第一个步长的MAE排序，没有结果（NaN）的模型排在最后
+    def sort_key(item):
+        mae = item[1]['mae'][horizons[0]]
+        return (np.isnan(mae), mae)
+
+    for fit_type, result in sorted(results.items(), key=sort_key):
+        line = f"{fit_type:<20}"
+        for h in horizons:
+            line += f"{result['mae'][h]:>12.3f}{result['mape'][h]:>11.3f}%"
+        print(line + f"{result['fit_seconds']:>9.2f}s{result['failures']:>6}")
+
+    with open(args.output, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter='\t')
+        writer.writerow(['model', 'horizon_hours', 'mae', 'mape', 'count', 'fit_seconds', 'failures'])
+        for fit_type, result in results.items():
+            for h in horizons:
+                writer.writerow([fit_type, h, result['mae'][h], result['mape'][h], result['count'][h],
+                                 result['fit_seconds'], result['failures']])
+    print(f"\n结果已保存到: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+import argparse
+import time
+import warnings
+import numpy as np
+from forecast_models import MODEL_FUNCS, fit_model
+
+warnings.filterwarnings('ignore')
+
+LINEAR_MODELS = ['linear_decay', 'logarithmic_decay', 'polynomial']
+NONLINEAR_MODELS = ['exponential_decay', 'polynomial_decay', 'gaussian_decay', 'power_decay']
+
+def pad_series(series):
+    """将不等长序列 [(x, y), ...] 补齐为二维数组，返回 (x, y, 掩码)；已对齐的二维数组可直接传入"""
+    if isinstance(series, tuple) and len(series) == 2 and np.ndim(series[0]) == 2:
+        x, y = (np.asarray(a, dtype=np.float64) for a in series)
+        mask = np.isfinite(x) & np.isfinite(y)
+        return np.where(mask, x, 0.0), np.where(mask, y, 0.0), mask
+
+    length = max(len(x) for x, _ in series)
+    x_pad = np.zeros((len(series), length))
+    y_pad = np.zeros((len(series), length))
+    mask = np.zeros((len(series), length), dtype=bool)
+    for i, (x, y) in enumerate(series):
+        x_pad[i, :len(x)] = x
+        y_pad[i, :len(y)] = y
+        mask[i, :len(x)] = True
+    mask &= np.isfinite(x_pad) & np.isfinite(y_pad)
+    return np.where(mask, x_pad, 0.0), np.where(mask, y_pad, 0.0), mask
+
+def batch_r_squared(y, y_pred, mask):
+    """逐序列计算R²"""
+    count = mask.sum(axis=1)
+    y_mean = np.where(mask, y, 0.0).sum(axis=1) / np.maximum(count, 1)
+    ss_res = np.where(mask, (y - y_pred) ** 2, 0.0).sum(axis=1)
+    ss_tot = np.where(mask, (y - y_mean[:, None]) ** 2, 0.0).sum(axis=1)
+    with np.errstate(all='ignore'):
+        return 1 - ss_res / ss_tot
+
+def _stacked_lstsq(basis, y, mask):
+    """对所有序列一次求解加权最小二乘 (ΦᵀWΦ) p = ΦᵀWy，basis形状为 (序列数, 点数, 参数数)"""
+    weighted_t = (basis * mask[:, :, None]).transpose(0, 2, 1)
+    gram = weighted_t @ basis
+    rhs = (weighted_t @ y[:, :, None])[:, :, 0]
+    # 奇异的序列（点数不足）加微小正则项，之后结果标记为NaN
+    k = basis.shape[2]
+    singular = mask.sum(axis=1) < k
+    gram[singular] += np.eye(k)
+    params = np.linalg.solve(gram, rhs[:, :, None])[:, :, 0]
+    params[singular] = np.nan
+    return params
+
+def fit_linear_batch(fit_type, x, y, mask, degree=3):
+    """线性、对数和多项式模型的批量拟合，返回 (参数, R²)；参数与forecast_models中的函数一致"""
+    if fit_type == 'linear_decay':
+        # y = a - b t
+        basis = np.stack([np.ones_like(x), -x], axis=2)
+        params = _stacked_lstsq(basis, y, mask)
+    elif fit_type == 'logarithmic_decay':
+        # y = a - b ln(t+1)
+        basis = np.stack([np.ones_like(x), -np.log(x + 1)], axis=2)
+        params = _stacked_lstsq(basis, y, mask)
+    elif fit_type == 'polynomial':
+        # 按序列缩放x以改善条件数，求解后换算回原始系数（从高次到低次，与np.polyfit一致）
+        scale = np.where(mask, np.abs(x), 0.0).max(axis=1)
+        scale = np.where(scale > 0, scale, 1.0)
+        basis = (x / scale[:, None])[:, :, None] ** np.arange(degree + 1)
+        scaled = _stacked_lstsq(basis, y, mask)
+        params = (scaled / scale[:, None] ** np.arange(degree + 1))[:, ::-1]
+    else:
+        raise ValueError(f"不支持的线性模型: {fit_type}")
+
+    y_pred = evaluate_batch(fit_type, x, params)
+    return params, batch_r_squared(y, y_pred, mask)
+
+def evaluate_batch(fit_type, x, params):
+    """在二维x上计算各序列的模型值，params形状为 (序列数, 参数数)"""
+    if fit_type == 'polynomial':
+        result = np.zeros_like(x)
+        for i in range(params.shape[1]):
+            result = result * x + params[:, i:i + 1]
+        return result
+    func = MODEL_FUNCS[fit_type]
+    with np.errstate(all='ignore'):
+        return func(x, *(params[:, i:i + 1] for i in range(params.shape[1])))
+
+def _polynomial_decay_cost(x, y, mask, n):
+    """给定各序列的指数n，a和c是线性参数，可批量最小二乘求解；返回 (a, c, 残差平方和)"""
+    g = np.power(x + 1, -n[:, None])
+    ac = _stacked_lstsq(np.stack([g, np.ones_like(x)], axis=2), y, mask)
+    cost = np.where(mask, (ac[:, :1] * g + ac[:, 1:] - y) ** 2, 0.0).sum(axis=1)
+    return ac[:, 0], ac[:, 1], np.where(np.isfinite(cost), cost, np.inf)
+
+def _polynomial_decay_guess(x, y, mask, n_min=1e-6, n_max=10.0, iterations=40):
+    """多项式衰减的初值：在log(n)上做批量黄金分割搜索，a和c按最小二乘消去（变量投影）
+
+    数据更接近指数或对数衰减时，最优解会退化为 n→0、a→∞（对数模型的极限），
+    此时搜索停在n_min附近，后续LM只需少量迭代。
+    """
+    lo = np.full(len(x), np.log(n_min))
+    hi = np.full(len(x), np.log(n_max))
+    ratio = (np.sqrt(5) - 1) / 2
+    m1, m2 = hi - ratio * (hi - lo), lo + ratio * (hi - lo)
+    cost1 = _polynomial_decay_cost(x, y, mask, np.exp(m1))[2]
+    cost2 = _polynomial_decay_cost(x, y, mask, np.exp(m2))[2]
+    for _ in range(iterations):
+        # 极小值在[lo, m2]内时收缩右端，否则收缩左端；每轮只需计算一个新点
+        left = cost1 < cost2
+        hi = np.where(left, m2, hi)
+        lo = np.where(left, lo, m1)
+        kept, kept_cost = np.where(left, m1, m2), np.where(left, cost1, cost2)
+        new = np.where(left, hi - ratio * (hi - lo), lo + ratio * (hi - lo))
+        new_cost = _polynomial_decay_cost(x, y, mask, np.exp(new))[2]
+        m1, cost1 = np.where(left, new, kept), np.where(left, new_cost, kept_cost)
+        m2, cost2 = np.where(left, kept, new), np.where(left, kept_cost, new_cost)
+    n = np.exp((lo + hi) / 2)
+    a, c, _ = _polynomial_decay_cost(x, y, mask, n)
+    return np.stack([a, n, c], axis=1)
+
+def batch_initial_guess(fit_type, x, y, mask):
+    """与forecast_models.initial_guess相同的初值，按序列向量化计算
+
+    首末点取各序列第一个和最后一个有效点（掩码为True），补齐或含NaN的位置不参与。
+    多项式衰减的固定初值(1000, 0.5)离最优解太远，改用_polynomial_decay_guess。
+    """
+    count = mask.sum(axis=1)
+    rows = np.arange(len(x))
+    first = mask.argmax(axis=1)
+    last = mask.shape[1] - 1 - mask[:, ::-1].argmax(axis=1)
+    y_first = y[rows, first]
+    y_last = y[rows, last]
+    x_first = x[rows, first]
+    if fit_type in ('exponential_decay', 'power_decay'):
+        return np.stack([y_first - y_last, np.full(len(x), 0.01), y_last], axis=1)
+    if fit_type == 'polynomial_decay':
+        return _polynomial_decay_guess(x, y, mask)
+    if fit_type == 'gaussian_decay':
+        x_mean = np.where(mask, x, 0.0).sum(axis=1) / np.maximum(count, 1)
+        x_std = np.sqrt(np.where(mask, (x - x_mean[:, None]) ** 2, 0.0).sum(axis=1) / np.maximum(count, 1))
+        return np.stack([y_first - y_last, x_first, x_std, y_last], axis=1)
+    raise ValueError(f"不支持的非线性模型: {fit_type}")
+
+def _exponential_jacobian(t, a, lam, c):
+    e = np.exp(-lam * t)
+    return [e, -a * t * e, np.ones_like(t)]
+
+def _polynomial_decay_jacobian(t, a, n, c):
+    g = np.power(t + 1, -n)
+    return [g, -a * g * np.log(t + 1), np.ones_like(t)]
+
+def _gaussian_jacobian(t, a, mu, sigma, c):
+    d = t - mu
+    e = np.exp(-(d ** 2) / (2 * sigma ** 2))
+    return [e, a * e * d / sigma ** 2, a * e * d ** 2 / sigma ** 3, np.ones_like(t)]
+
+def _power_jacobian(t, a, r, c):
+    g = np.power(1 - r, t)
+    return [g, -a * t * g / (1 - r), np.ones_like(t)]
+
+# 解析雅可比（对各参数的偏导），每次迭代只需一次指数运算
+JACOBIANS = {
+    'exponential_decay': _exponential_jacobian,
+    'polynomial_decay': _polynomial_decay_jacobian,
+    'gaussian_decay': _gaussian_jacobian,
+    'power_decay': _power_jacobian,
+}
+
+def batch_jacobian_t(fit_type, x, params, mask):
+    """计算各序列雅可比矩阵的转置 (序列数, 参数数, 点数)，掩码外及无效值为0"""
+    k = params.shape[1]
+    jacobian_t = np.empty((x.shape[0], k, x.shape[1]))
+    with np.errstate(all='ignore'):
+        columns = JACOBIANS[fit_type](x, *(params[:, i:i + 1] for i in range(k)))
+        for i, column in enumerate(columns):
+            np.multiply(column, mask, out=jacobian_t[:, i, :])
+    return np.nan_to_num(jacobian_t, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+
+def _cost(fit_type, x, y, mask, params):
+    residual = np.where(mask, evaluate_batch(fit_type, x, params) - y, 0.0)
+    cost = (residual ** 2).sum(axis=1)
+    return residual, np.where(np.isfinite(cost), cost, np.inf)
+
+def fit_nonlinear_batch(fit_type, x, y, mask, p0=None, max_iter=100, ftol=1.5e-8, xtol=1.5e-8):
+    """批量Levenberg–Marquardt：所有序列的参数堆叠为 (序列数, 参数数) 数组同时迭代
+
+    雅可比矩阵按解析偏导批量计算，每个序列有独立的阻尼系数；
+    收敛判据（ftol、xtol）与scipy的curve_fit默认值相同。返回 (参数, R², 是否收敛)。
+    """
+    params = batch_initial_guess(fit_type, x, y, mask) if p0 is None else np.array(p0, dtype=np.float64)
+    num_series, k = params.shape
+    damping = np.full(num_series, 1e-3)
+    residual, cost = _cost(fit_type, x, y, mask, params)
+    converged = ~np.isfinite(cost)  # 初值无效的序列不参与迭代
+
+    for _ in range(max_iter):
+        active = ~converged
+        if not active.any():
+            break
+        if active.all():
+            xa, ya, ma, pa, ra = x, y, mask, params, residual
+        else:
+            xa, ya, ma, pa, ra = x[active], y[active], mask[active], params[active], residual[active]
+
+        # (JᵀJ + λ diag(JᵀJ)) δ = -Jᵀr，用批量矩阵乘法求各序列的法方程
+        jacobian_t = batch_jacobian_t(fit_type, xa, pa, ma)
+        jtj = jacobian_t @ jacobian_t.transpose(0, 2, 1)
+        jtr = (jacobian_t @ ra[:, :, None])[:, :, 0]
+        diag = np.einsum('skk->sk', jtj)
+        lhs = jtj + (damping[active][:, None] * np.maximum(diag, 1e-12))[:, :, None] * np.eye(k)
+        try:
+            delta = np.linalg.solve(lhs, -jtr[:, :, None])[:, :, 0]
+        except np.linalg.LinAlgError:
+            delta = np.stack([np.linalg.lstsq(a, -b, rcond=None)[0] for a, b in zip(lhs, jtr)])
+
+        candidate = pa + delta
+        new_residual, new_cost = _cost(fit_type, xa, ya, ma, candidate)
+        old_cost = cost[active]
+        improved = new_cost < old_cost
+
+        # 接受改进的步长并减小阻尼，否则增大阻尼
+        index = np.flatnonzero(active)
+        accepted = index[improved]
+        params[accepted] = candidate[improved]
+        residual[accepted] = new_residual[improved]
+        cost[accepted] = new_cost[improved]
+        damping[accepted] = np.maximum(damping[accepted] / 10, 1e-12)
+        damping[index[~improved]] *= 10
+
+        relative_change = np.abs(old_cost - new_cost) / np.maximum(old_cost, 1e-300)
+        small_step = (np.linalg.norm(delta, axis=1)
+                      <= xtol * (np.linalg.norm(candidate, axis=1) + xtol))
+        done = (improved & ((relative_change < ftol) | small_step)) | (damping[index] > 1e12)
+        converged[index[done]] = True
+
+    y_pred = evaluate_batch(fit_type, x, params)
+    return params, batch_r_squared(y, y_pred, mask), converged & np.isfinite(cost)
+
+def refit_unconverged(fit_type, x, y, mask, params, r2, converged):
+    """对批量迭代未收敛的序列逐条调用fit_model，结果更好时替换，保证不差于单序列拟合"""
+    for i in np.flatnonzero(~converged):
+        xi, yi = x[i, mask[i]], y[i, mask[i]]
+        try:
+            func, popt = fit_model(fit_type, xi, yi)
+        except Exception:
+            continue
+        y_pred = func(xi, *popt)
+        r2_single = 1 - np.sum((yi - y_pred) ** 2) / np.sum((yi - yi.mean()) ** 2)
+        if np.isfinite(r2_single) and not r2_single < r2[i]:
+            params[i], r2[i], converged[i] = popt, r2_single, True
+    return params, r2, converged
+
+def fit_batch(series, models=None, degree=3, series_ids=None, fallback=False):
+    """对多条序列批量拟合多个模型，返回参数和R²的表格（pandas.DataFrame）
+
+    series为 [(x, y), ...]（可不等长），或补齐后的 (x二维数组, y二维数组)，缺失值为NaN。
+    未收敛的序列converged列为False（高斯衰减等在数据上没有有限极小值的模型通常如此）。
+    fallback为True时这些序列改用fit_model逐条拟合，耗时与逐条curve_fit相当，默认关闭。
+    """
+    import pandas as pd
+
+    x, y, mask = pad_series(series)
+    series_ids = list(range(len(x))) if series_ids is None else list(series_ids)
+    models = models or LINEAR_MODELS + NONLINEAR_MODELS
+
+    rows = []
+    for fit_type in models:
+        start = time.perf_counter()
+        if fit_type in LINEAR_MODELS:
+            params, r2 = fit_linear_batch(fit_type, x, y, mask, degree)
+            converged = np.isfinite(params).all(axis=1)
+        else:
+            params, r2, converged = fit_nonlinear_batch(fit_type, x, y, mask)
+            if fallback:
+                params, r2, converged = refit_unconverged(fit_type, x, y, mask, params, r2, converged)
+        elapsed = time.perf_counter() - start
+        for i, series_id in enumerate(series_ids):
+            rows.append({
+                'series': series_id,
+                'model': fit_type,
+                'r2': float(r2[i]),
+                'converged': bool(converged[i]),
+                'params': tuple(float(p) for p in params[i]),
+                'fit_seconds': elapsed,  # 该模型整批拟合的耗时
+            })
+    return pd.DataFrame(rows)
+
+def make_synthetic_series(count, min_points=200, max_points=1500, seed=0):
+    """生成模拟多个账号的不等长掉粉序列，用于性能测试"""
+    rng = np.random.default_rng(seed)
+    series = []
+    for _ in range(count):
+        n = rng.integers(min_points, max_points + 1)
+        x = np.sort(rng.uniform(0, 48, n))
+        a, lam, c = rng.uniform(100, 400), rng.uniform(0.01, 0.1), rng.uniform(1500, 2000)
+        series.append((x, a * np.exp(-lam * x) + c + rng.normal(0, 1.0, n)))
+    return series
+
+def main():
+    parser = argparse.ArgumentParser(description='多账号序列批量拟合')
+    parser.add_argument('--series', type=int, default=2000, help='模拟序列数')
+    parser.add_argument('--compare', type=int, default=50, help='用逐条curve_fit对比的序列数')
+    parser.add_argument('--fallback', action='store_true', help='未收敛的序列逐条用curve_fit重新拟合（较慢）')
+    args = parser.parse_args()
+
+    series = make_synthetic_series(args.series)
+    print(f"模拟序列: {len(series)} 条, 共 {sum(len(x) for x, _ in series)} 个数据点")
+
+    start = time.perf_counter()
+    table = fit_batch(series, fallback=args.fallback)
+    elapsed = time.perf_counter() - start
+    print(f"批量拟合 {len(table['model'].unique())} 个模型, 耗时 {elapsed:.2f} 秒\n")
+    summary = table.groupby('model').agg(r2_median=('r2', 'median'), converged=('converged', 'mean'),
+                                         fit_seconds=('fit_seconds', 'first'))
+    print(summary.to_string())
+    unconverged = table[~table['converged']].groupby('model').size()
+    if len(unconverged):
+        print("\n未收敛的序列数（converged=False，可用--fallback逐条重新拟合）:")
+        print(unconverged.to_string())
+
+    # 与逐条curve_fit对比（指数衰减）
+    subset = series[:args.compare]
+    start = time.perf_counter()
+    loop_r2 = []
+    for x, y in subset:
+        try:
+            func, params = fit_model('exponential_decay', x, y)
+            y_pred = func(x, *params)
+            loop_r2.append(1 - np.sum((y - y_pred) ** 2) / np.sum((y - y.mean()) ** 2))
+        except Exception:
+            loop_r2.append(np.nan)
+    loop_elapsed = time.perf_counter() - start
+    batch_r2 = table[table['model'] == 'exponential_decay']['r2'].values[:args.compare]
+    print(f"\n逐条curve_fit指数衰减 {len(subset)} 条耗时 {loop_elapsed:.2f} 秒 "
+          f"(折算 {len(series)} 条约 {loop_elapsed / len(subset) * len(series):.1f} 秒)")
+    print(f"指数衰减R²最大差异: {np.nanmax(np.abs(np.array(loop_r2) - batch_r2)):.2e}")
+
+if __name__ == "__main__":
+    main()
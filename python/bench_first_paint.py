@@ -0,0 +1,68 @@
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from datetime import datetime, timedelta
+from forecast_models import load_series
+
+def write_series(path, n, seed=0):
+    """生成n个点的合成时间序列（每分钟一个点的缓慢下降加噪声）"""
+    rng = np.random.default_rng(seed)
+    start = datetime(2025, 7, 1)
+    values = 2100 - np.arange(n) * (300 / n) + rng.normal(0, 5, n)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i, value in enumerate(values):
+            f.write(f"{(start + timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M:%S')}\t{value:.1f}\n")
+
+def first_paint(data, backend='Agg'):
+    """按data_visualizer的方式创建图表并完成首次绘制（无窗口，使用Agg画布）"""
+    from data_visualizer import setup_matplotlib
+    matplotlib = setup_matplotlib()
+    matplotlib.use(backend)
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot(111)
+    canvas = FigureCanvasAgg(fig)
+    scatter = ax.scatter([], [], alpha=0.6, s=20, color='blue', label='原始数据')
+    ax.grid(True, alpha=0.3)
+
+    x = data['hours'].values
+    y = data['value'].values
+    scatter.set_offsets(np.column_stack([x, y]))
+    x_margin = (x.max() - x.min()) * 0.05 or 1
+    y_margin = (y.max() - y.min()) * 0.05 or 1
+    ax.set_ylim(y.min() - y_margin, y.max() + y_margin)
+    ax.set_xlim(x.min() - x_margin, x.max() + x_margin)
+    ax.legend(handles=[scatter])
+    canvas.draw()
+
+def main():
+    parser = argparse.ArgumentParser(description='大数据量下数据可视化首次绘制耗时测试')
+    parser.add_argument('--points', type=int, nargs='*', default=[100_000, 1_000_000], help='合成序列的点数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.points:
+            data_file = os.path.join(tmp, f'series_{n}.txt')
+            write_series(data_file, n)
+
+            start = time.perf_counter()
+            data = load_series(data_file)
+            parse_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            data = load_series(data_file)
+            cached_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            first_paint(data)
+            paint_time = time.perf_counter() - start
+
+            print(f"{n:>9} 点: 解析 {parse_time:.3f} 秒, 缓存读取 {cached_time:.3f} 秒, "
+                  f"首次绘制 {paint_time:.3f} 秒, 合计(缓存命中) {cached_time + paint_time:.3f} 秒")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
+import argparse
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import matplotlib.pyplot as plt
 
 def detect_and_remove_anomalies():
-    """检测并移除异常数据点"""
+    """检测并移除异常数据点（整个文件读入内存，并绘制对比图）"""
     
     # 读取数据
     data = []
@@ -121,13 +122,76 @@ def detect_and_remove_anomalies():
     
     return clean_df, anomaly_df
 
+def stream_remove_anomalies(state_file=None, data_file='filtered_comments.txt', jump_threshold=50):
+    """流式版本：内存占用与文件大小无关
+    
+    第一遍由streaming_stats的草图计算IQR和Z-score的界限（可用state_file续算，只读取新追加的行），
+    第二遍逐行套用与detect_and_remove_anomalies相同的四条规则，边读边写出结果，不绘制对比图。
+    跳跃异常按文件顺序与上一行比较，文件按时间排序时与内存版本结果一致；误差范围见StreamingStats的说明。
+    """
+    from streaming_stats import update_stats
+    
+    stats = update_stats([data_file], state_file)
+    lower_bound, upper_bound = stats.iqr_bounds()
+    z_lower, z_upper = stats.zscore_bounds()
+    print(f"数据点数量: {stats.count}")
+    
+    counts = {'range': 0, 'iqr': 0, 'zscore': 0, 'jump': 0, 'total': 0}
+    previous = None
+    with open(data_file, 'r', encoding='utf-8') as f, \
+         open('filtered_comments_cleaned.txt', 'w', encoding='utf-8') as clean_file, \
+         open('anomalies_removed.txt', 'w', encoding='utf-8') as anomaly_file:
+        anomaly_file.write("移除的异常数据点:\n")
+        anomaly_file.write("=" * 60 + "\n")
+        for line_num, line in enumerate(f, 1):
+            parts = line.strip().split('\t')
+            if len(parts) != 2:
+                continue
+            time_str, value_str = parts
+            timestamp = datetime.strptime(time_str, '%Y-%m-%d %H:%M:%S')
+            value = float(value_str)
+            
+            flags = {
+                'range': value > 2200 or value < 1800,
+                'iqr': value < lower_bound or value > upper_bound,
+                'zscore': value < z_lower or value > z_upper,
+                'jump': previous is not None and abs(value - previous) > jump_threshold,
+            }
+            previous = value
+            for name, flagged in flags.items():
+                counts[name] += flagged
+            
+            if any(flags.values()):
+                counts['total'] += 1
+                anomaly_file.write(f"行 {line_num:4d}: {line.strip()}\n")
+            else:
+                clean_file.write(f"{timestamp.strftime('%Y-%m-%d %H:%M:%S')}\t{value}\n")
+    
+    print(f"\n异常值统计:")
+    print(f"- 范围异常 (>2200 或 <1800): {counts['range']} 个")
+    print(f"- IQR异常 (<{lower_bound:.1f} 或 >{upper_bound:.1f}): {counts['iqr']} 个")
+    print(f"- Z-score异常 (|z|>3): {counts['zscore']} 个")
+    print(f"- 跳跃异常 (相邻差值>{jump_threshold}): {counts['jump']} 个")
+    print(f"- 总异常数量: {counts['total']} 个")
+    return counts
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='数据异常检测与清理工具')
+    parser.add_argument('--streaming', action='store_true',
+                        help='流式处理：草图计算IQR和Z-score界限后逐行清理，不读入整个文件，不生成对比图')
+    parser.add_argument('--state', help='流式草图状态文件（续算）')
+    args = parser.parse_args()
+    
     print("数据异常检测与清理工具")
     print("=" * 50)
     
-    clean_data, anomalies = detect_and_remove_anomalies()
+    if args.streaming:
+        stream_remove_anomalies(state_file=args.state)
+    else:
+        clean_data, anomalies = detect_and_remove_anomalies()
     
     print(f"\n处理完成！")
     print(f"- 清理后的数据已保存到: filtered_comments_cleaned.txt")
     print(f"- 异常数据记录已保存到: anomalies_removed.txt")
-    print(f"- 对比图表已保存到: data_cleaning_comparison.png")
\ No newline at end of file
+    if not args.streaming:
+        print(f"- 对比图表已保存到: data_cleaning_comparison.png")
\ No newline at end of file
@@ -0,0 +1,201 @@
+import argparse
+import csv
+import glob
+import sqlite3
+from datetime import datetime, timezone, timedelta
+from csv_processor_improved import process_rows, filter_same_time_records
+from spam_filter import suppress_spam
+
+DB_FILE = 'comments.db'
+
+# 写入数据库的CSV字段
+COLUMNS = [
+    'comment_id', 'create_time', 'ip_location', 'aweme_id', 'content',
+    'user_id', 'sec_uid', 'nickname', 'sub_comment_count', 'like_count',
+    'parent_comment_id',
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS comments (
+    id INTEGER PRIMARY KEY,  -- 显式的rowid别名，VACUUM后不会重新编号，全文索引按它关联
+    comment_id TEXT UNIQUE NOT NULL,
+    create_time INTEGER NOT NULL,
+    ip_location TEXT,
+    aweme_id TEXT,
+    content TEXT NOT NULL,
+    user_id TEXT,
+    sec_uid TEXT,
+    nickname TEXT,
+    sub_comment_count INTEGER,
+    like_count INTEGER,
+    parent_comment_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_comments_create_time ON comments(create_time);
+CREATE INDEX IF NOT EXISTS idx_comments_aweme_id ON comments(aweme_id, create_time);
+CREATE INDEX IF NOT EXISTS idx_comments_user_id ON comments(user_id);
+
+-- 评论内容全文索引（trigram分词，支持中文和数字的子串匹配）
+CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5(
+    content, content='comments', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS comments_ai AFTER INSERT ON comments BEGIN
+    INSERT INTO comments_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS comments_ad AFTER DELETE ON comments BEGIN
+    INSERT INTO comments_fts(comments_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS comments_au AFTER UPDATE OF content ON comments BEGIN
+    INSERT INTO comments_fts(comments_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    INSERT INTO comments_fts(rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+UPSERT_SQL = f"""
+INSERT INTO comments ({', '.join(COLUMNS)})
+VALUES ({', '.join('?' for _ in COLUMNS)})
+ON CONFLICT(comment_id) DO UPDATE SET
+    {', '.join(f'{col} = excluded.{col}' for col in COLUMNS[1:])}
+"""
+
+BEIJING_TZ = timezone(timedelta(hours=8))
+
+def open_store(db_path=DB_FILE):
+    """打开评论数据库，不存在时自动建表"""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+
+    # 旧版表以隐式rowid关联全文索引，VACUUM后可能错位，需删除数据库后重新导入CSV
+    columns = [row['name'] for row in conn.execute('PRAGMA table_info(comments)')]
+    if columns and 'id' not in columns:
+        conn.close()
+        raise sqlite3.DatabaseError(f"{db_path} 是旧版结构，请删除后重新执行 ingest")
+
+    conn.executescript(SCHEMA)
+    return conn
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _read_rows(csv_file):
+    """逐行读取CSV，转换为写入数据库的参数元组"""
+    # utf-8-sig 去掉文件开头的BOM
+    with open(csv_file, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            if not row.get('comment_id') or _to_int(row.get('create_time')) is None:
+                continue
+            yield (
+                row['comment_id'],
+                int(row['create_time']),
+                row.get('ip_location'),
+                row.get('aweme_id'),
+                row.get('content') or '',
+                row.get('user_id'),
+                row.get('sec_uid'),
+                row.get('nickname'),
+                _to_int(row.get('sub_comment_count')),
+                _to_int(row.get('like_count')),
+                row.get('parent_comment_id'),
+            )
+
+def ingest_csv_files(conn, csv_files):
+    """批量导入评论CSV，按comment_id去重更新"""
+    total = 0
+    for csv_file in csv_files:
+        try:
+            with conn:  # 每个文件一个事务
+                count = conn.executemany(UPSERT_SQL, _read_rows(csv_file)).rowcount
+        except (OSError, csv.Error, sqlite3.Error) as e:
+            print(f"导入 {csv_file} 时出错: {e}")
+            continue
+        total += count
+        print(f"  {csv_file}: 写入 {count} 条")
+    return total
+
+def number_match_query(low=1800, high=2400):
+    """生成匹配数字范围的FTS查询：按前三位数字做子串匹配（trigram至少3个字符）"""
+    prefixes = sorted({str(n)[:3] for n in range(low, high + 1)})
+    return ' OR '.join(f'"{p}"' for p in prefixes)
+
+def beijing_time_to_timestamp(time_str):
+    """北京时间字符串转换为UTC时间戳"""
+    local_time = datetime.strptime(time_str, '%Y-%m-%d %H:%M:%S').replace(tzinfo=BEIJING_TZ)
+    return int(local_time.timestamp())
+
+def query_candidates(conn, start_time=None, end_time=None, aweme_id=None, match=None):
+    """用全文索引和时间范围筛选候选评论，返回字典列表"""
+    sql = (f"SELECT {', '.join('c.' + col for col in COLUMNS)} "
+           'FROM comments_fts f JOIN comments c ON c.id = f.rowid '
+           'WHERE comments_fts MATCH ?')
+    params = [match or number_match_query()]
+    if start_time is not None:
+        sql += ' AND c.create_time >= ?'
+        params.append(start_time)
+    if end_time is not None:
+        sql += ' AND c.create_time <= ?'
+        params.append(end_time)
+    if aweme_id:
+        sql += ' AND c.aweme_id = ?'
+        params.append(aweme_id)
+    sql += ' ORDER BY c.create_time'
+    return [dict(row) for row in conn.execute(sql, params)]
+
+def latest_create_time(conn):
+    """数据库中最新评论的时间戳"""
+    return conn.execute('SELECT MAX(create_time) FROM comments').fetchone()[0]
+
+def main():
+    parser = argparse.ArgumentParser(description='评论SQLite存储：导入CSV并按全文索引筛选候选评论')
+    parser.add_argument('--db', default=DB_FILE, help='数据库文件路径')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = subparsers.add_parser('ingest', help='导入评论CSV')
+    ingest_parser.add_argument('files', nargs='*', help='CSV文件，默认为当前目录下所有CSV')
+
+    query_parser = subparsers.add_parser('query', help='在时间范围内对候选评论执行筛选规则')
+    query_parser.add_argument('--start', help='开始时间 (北京时间 YYYY-MM-DD HH:MM:SS)')
+    query_parser.add_argument('--end', help='结束时间 (北京时间 YYYY-MM-DD HH:MM:SS)')
+    query_parser.add_argument('--last-hours', type=float, help='只查询最新评论之前若干小时')
+    query_parser.add_argument('--aweme', help='作品ID')
+    query_parser.add_argument('--match', help='自定义FTS5查询，默认匹配1800-2400的数字')
+    query_parser.add_argument('--output', default='filtered_comments_from_db.txt', help='输出文件')
+
+    args = parser.parse_args()
+    conn = open_store(args.db)
+
+    if args.command == 'ingest':
+        csv_files = args.files or glob.glob('*.csv')
+        print(f"导入 {len(csv_files)} 个CSV文件到 {args.db}")
+        total = ingest_csv_files(conn, csv_files)
+        count = conn.execute('SELECT COUNT(*) FROM comments').fetchone()[0]
+        print(f"本次写入 {total} 条，数据库共 {count} 条评论")
+        return
+
+    start_time = beijing_time_to_timestamp(args.start) if args.start else None
+    end_time = beijing_time_to_timestamp(args.end) if args.end else None
+    if args.last_hours is not None:
+        latest = end_time or latest_create_time(conn)
+        if latest is not None:
+            start_time = int(latest - args.last_hours * 3600)
+
+    candidates = query_candidates(conn, start_time, end_time, args.aweme, args.match)
+    print(f"全文索引候选评论: {len(candidates)} 条")
+
+    records = process_rows(candidates)
+    print(f"符合筛选规则: {len(records)} 条")
+    records, suppressed = suppress_spam(records)
+    records = filter_same_time_records(records)
+    records.sort(key=lambda x: x[0])
+    print(f"抑制刷屏 {len(suppressed)} 条，过滤同一时间记录后: {len(records)} 条")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        for timestamp, formatted_time, number, confidence, comment, user_id in records:
+            f.write(f"{formatted_time}\t{number}\n")
+    print(f"结果已保存到: {args.output}")
+
+if __name__ == "__main__":
+    main()
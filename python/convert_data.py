@@ -1,10 +1,16 @@
+import argparse
 import datetime
 import json
 
-def convert_txt_to_js():
-    """将filtered_comments.txt转换为JavaScript数据文件"""
+def convert_txt_to_js(kalman=False, smooth=False, models=False):
+    """将filtered_comments.txt转换为JavaScript数据文件
+    
+    kalman为True时同时写入卡尔曼滤波结果（KALMAN_DATA），smooth为True时使用RTS平滑；
+    models为True时写入预计算的模型参数、预测网格和里程碑时间（MODEL_DATA），前端不再重复拟合
+    """
     
     data = []
+    reports = []  # (时间字符串, 时间, 粉丝数, 原评论)，供卡尔曼滤波使用
     
     try:
         with open('filtered_comments.txt', 'r', encoding='utf-8') as file:
@@ -30,6 +36,7 @@ def convert_txt_to_js():
                                 'fans': fans,
                                 'time': int(timestamp.timestamp() * 1000)  # JavaScript时间戳
                             })
+                            reports.append((timestamp_str, timestamp, fans, parts[2] if len(parts) >= 3 else None))
                     except (ValueError, TypeError) as e:
                         print(f"跳过无效数据行: {line} - {e}")
                         continue
@@ -39,12 +46,41 @@ def convert_txt_to_js():
         
         print(f"成功转换 {len(data)} 条数据")
         
+        # 卡尔曼滤波结果
+        kalman_js = ""
+        if kalman:
+            from csv_processor_improved import calculate_confidence
+            from kalman_tracker import load_confidences, track_reports
+            
+            # 观测噪声由原评论的置信度决定：原评论来自filtered_comments_with_original.txt
+            confidences = load_confidences()
+            reports = [(timestamp, fans, calculate_confidence(comment, fans) if comment
+                        else confidences.get((timestamp_str, fans)))
+                       for timestamp_str, timestamp, fans, comment in sorted(reports, key=lambda r: r[1])]
+            matched = sum(1 for _, _, confidence in reports if confidence is not None)
+            print(f"卡尔曼滤波: {matched}/{len(reports)} 条报数按原评论置信度设置观测噪声")
+            kalman_result = track_reports(reports, smooth=smooth)
+            if kalman_result:
+                kalman_js = f"\nconst KALMAN_DATA = {json.dumps(kalman_result, indent=2, ensure_ascii=False)};\n"
+                print(f"卡尔曼滤波: 当前 {kalman_result['level']:.2f} 万, "
+                      f"掉粉速度 {kalman_result['decay_rate']:.4f} 万/小时")
+        
         # 生成JavaScript文件
+        # 预计算模型
+        models_js = ""
+        if models:
+            from model_export import build_model_data
+            
+            model_data = build_model_data(data)
+            if model_data:
+                models_js = f"\nconst MODEL_DATA = {json.dumps(model_data, ensure_ascii=False)};\n"
+                print("已预计算线性回归和指数衰减模型")
+        
         js_content = f"""// 自动生成的粉丝数据文件
 // 生成时间: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
 const FANS_DATA = {json.dumps(data, indent=2, ensure_ascii=False)};
-
+{kalman_js}{models_js}
 // 导出数据
 if (typeof module !== 'undefined' && module.exports) {{
     module.exports = FANS_DATA;
@@ -70,4 +106,10 @@ if (typeof module !== 'undefined' && module.exports) {{
         print(f"转换过程中出现错误: {e}")
 
 if __name__ == "__main__":
-    convert_txt_to_js()  # 修复了函数名
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='将报数数据转换为js/data.js')
+    parser.add_argument('--kalman', action='store_true', help='写入卡尔曼滤波结果')
+    parser.add_argument('--smooth', action='store_true', help='卡尔曼结果使用RTS平滑')
+    parser.add_argument('--models', action='store_true', help='写入预计算的模型和预测网格')
+    args = parser.parse_args()
+    
+    convert_txt_to_js(kalman=args.kalman, smooth=args.smooth, models=args.models)  # 修复了函数名
\ No newline at end of file
@@ -3,6 +3,7 @@ import re
 import glob
 from datetime import datetime, timezone, timedelta
 from collections import defaultdict
+from spam_filter import suppress_spam
 
 def timestamp_to_beijing_time(timestamp_str):
     """将UTC时间戳转换为北京时间"""
@@ -160,49 +161,53 @@ def is_valid_comment(comment):
     
     return True
 
-def process_single_csv_file(input_file):
-    """处理单个CSV文件，返回有效记录列表"""
+def process_rows(rows):
+    """对评论行（包含content、create_time、user_id等字段的字典）应用筛选规则，返回有效记录列表"""
     valid_records = []
     
+    for row in rows:
+        comment = row['content']
+        create_time = row['create_time']
+        
+        # 检查评论是否符合条件
+        if is_valid_comment(comment):
+            # 转换时间格式（修正时区）
+            formatted_time = timestamp_to_beijing_time(create_time)
+            if formatted_time:
+                # 提取数字
+                numbers = extract_number_from_comment(comment)
+                if numbers:
+                    number = numbers[0]  # 取第一个数字
+                    confidence = calculate_confidence(comment, number)
+                    # 保存时间戳用于排序，格式化时间用于输出，包含置信度、原评论和用户ID
+                    valid_records.append((
+                        int(create_time), 
+                        formatted_time, 
+                        number, 
+                        confidence, 
+                        comment,
+                        row.get('user_id') or row.get('sec_uid') or ''
+                    ))
+    
+    return valid_records
+
+def process_single_csv_file(input_file):
+    """处理单个CSV文件，返回有效记录列表"""
     try:
         with open(input_file, 'r', encoding='utf-8') as csvfile:
             reader = csv.DictReader(csvfile)
-            
-            for row in reader:
-                comment = row['content']
-                create_time = row['create_time']
-                
-                # 检查评论是否符合条件
-                if is_valid_comment(comment):
-                    # 转换时间格式（修正时区）
-                    formatted_time = timestamp_to_beijing_time(create_time)
-                    if formatted_time:
-                        # 提取数字
-                        numbers = extract_number_from_comment(comment)
-                        if numbers:
-                            number = numbers[0]  # 取第一个数字
-                            confidence = calculate_confidence(comment, number)
-                            # 保存时间戳用于排序，格式化时间用于输出，包含置信度和原评论
-                            valid_records.append((
-                                int(create_time), 
-                                formatted_time, 
-                                number, 
-                                confidence, 
-                                comment
-                            ))
+            return process_rows(reader)
     
     except Exception as e:
         print(f"读取CSV文件 {input_file} 时出错: {e}")
         return []
-    
-    return valid_records
 
 def filter_same_time_records(records):
     """过滤同一时间的记录，保留置信度最高的"""
     # 按时间戳分组
     time_groups = defaultdict(list)
     for record in records:
-        timestamp, formatted_time, number, confidence, comment = record
+        timestamp = record[0]
         time_groups[timestamp].append(record)
     
     filtered_records = []
@@ -242,6 +247,10 @@ def process_all_csv_files():
     
     print(f"\n过滤前总记录数: {len(all_valid_records)}")
     
+    # 抑制刷屏和复制粘贴评论
+    all_valid_records, suppressed_records = suppress_spam(all_valid_records)
+    print(f"抑制刷屏/近似重复评论后: {len(all_valid_records)} (移除 {len(suppressed_records)} 条)")
+    
     # 过滤同一时间的记录
     filtered_records = filter_same_time_records(all_valid_records)
     print(f"过滤同一时间记录后: {len(filtered_records)}")
@@ -253,18 +262,25 @@ def process_all_csv_files():
     try:
         # 文件1：只包含数字和时间
         with open("filtered_comments_numbers_only.txt", 'w', encoding='utf-8') as txtfile:
-            for timestamp, formatted_time, number, confidence, comment in filtered_records:
+            for timestamp, formatted_time, number, confidence, comment, user_id in filtered_records:
                 txtfile.write(f"{formatted_time}\t{number}\n")
         
         # 文件2：包含原评论、数字和时间
         with open("filtered_comments_with_original.txt", 'w', encoding='utf-8') as txtfile:
-            for timestamp, formatted_time, number, confidence, comment in filtered_records:
+            for timestamp, formatted_time, number, confidence, comment, user_id in filtered_records:
                 txtfile.write(f"{formatted_time}\t{number}\t{comment}\n")
         
+        # 文件3：被抑制的评论及原因
+        with open("suppressed_comments.txt", 'w', encoding='utf-8') as txtfile:
+            for record, reason in suppressed_records:
+                timestamp, formatted_time, number, confidence, comment, user_id = record
+                txtfile.write(f"{formatted_time}\t{number}\t{user_id}\t{reason}\t{comment}\n")
+        
         print(f"\n处理完成！共筛选出 {len(filtered_records)} 条符合条件的评论")
         print(f"结果已按北京时间顺序保存到:")
         print(f"  - filtered_comments_numbers_only.txt (仅数字和时间)")
         print(f"  - filtered_comments_with_original.txt (包含原评论)")
+        print(f"  - suppressed_comments.txt (被抑制的刷屏/重复评论及原因)")
         
         # 显示一些统计信息
         print(f"\n统计信息:")
@@ -276,6 +292,7 @@ def process_all_csv_files():
         print(f"- 排除了年份相关评论（如'2018回不去了'、'现在2024年'）")
         print(f"- 排除了'等xxx的人'类型评论")
         print(f"- 屏蔽了包含'2000万'和'突破'等关键词的评论")
+        print(f"- 限制了同一用户短时间内的报数次数，移除了复制粘贴的近似重复评论")
         print(f"- 对同一时间的多条评论选择了置信度最高的记录")
         
         # 显示置信度分布
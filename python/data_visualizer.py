@@ -1,18 +1,23 @@
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import pandas as pd
 import numpy as np
 from datetime import datetime
-from scipy.optimize import curve_fit
-from scipy import stats
+from forecast_models import load_series, fit_model, r_squared
 import warnings
 warnings.filterwarnings('ignore')
 
-# 配置matplotlib中文字体
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']  # 设置中文字体
-plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
+# 程序启动时刻，用于统计首次绘制耗时
+_START_TIME = time.perf_counter()
+
+def setup_matplotlib():
+    """延迟导入matplotlib并配置中文字体"""
+    import matplotlib
+    matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']  # 设置中文字体
+    matplotlib.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
+    return matplotlib
 
 class DataVisualizer:
     def __init__(self, root):
@@ -25,11 +30,26 @@ class DataVisualizer:
         self.fitted_func = None
         self.fitted_params = None
         self.r_squared = 0
+        self.decomposition = None  # 周期分解结果（未启用时为None）
+        
+        # 图表组件延迟创建
+        self.fig = None
+        self.ax = None
+        self.canvas = None
+        self.first_paint_done = False
+        
+        # 持久化的图形元素，后续只原地更新数据
+        self.scatter = None
+        self.fit_line = None
+        self.predict_marker = None
+        self.background = None
+        self.load_queue = queue.Queue()
         
         # 创建界面
         self.create_widgets()
         
-        # 加载数据
+        # 窗口显示后再创建图表，数据在后台线程加载
+        self.root.after_idle(self.create_chart)
         self.load_data()
     
     def create_widgets(self):
@@ -77,6 +97,11 @@ class DataVisualizer:
                                  textvariable=self.degree_var)
         degree_spin.pack(side=tk.RIGHT)
         
+        # 趋势之外叠加日/周周期分量
+        self.seasonal_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(fit_frame, text="叠加日/周周期分量", variable=self.seasonal_var).pack(
+            anchor=tk.W, padx=10, pady=2)
+        
         ttk.Button(fit_frame, text="执行拟合", command=self.fit_function).pack(
             fill=tk.X, padx=10, pady=10)
         
@@ -108,108 +133,165 @@ class DataVisualizer:
         self.predict_label.pack(padx=10, pady=(0, 10))
         
         # 右侧图表区域
-        chart_frame = ttk.Frame(main_frame)
-        chart_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+        self.chart_frame = ttk.Frame(main_frame)
+        self.chart_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+    
+    def create_chart(self):
+        """创建matplotlib图表（延迟导入matplotlib）"""
+        setup_matplotlib()
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
         
-        # 创建matplotlib图表
-        self.fig, self.ax = plt.subplots(figsize=(10, 6))
-        self.canvas = FigureCanvasTkAgg(self.fig, chart_frame)
+        self.fig = Figure(figsize=(10, 6))
+        self.ax = self.fig.add_subplot(111)
+        self.canvas = FigureCanvasTkAgg(self.fig, self.chart_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         
         # 图表工具栏
-        toolbar_frame = ttk.Frame(chart_frame)
+        toolbar_frame = ttk.Frame(self.chart_frame)
         toolbar_frame.pack(fill=tk.X)
-        from matplotlib.backends.backend_tkagg import NavigationToolbar2Tk
         toolbar = NavigationToolbar2Tk(self.canvas, toolbar_frame)
         toolbar.update()
+        
+        if self.data is not None:
+            self.plot_data()
+        else:
+            self.canvas.draw()
+            self.report_first_paint()
+    
+    def report_first_paint(self):
+        """输出首次绘制耗时"""
+        if not self.first_paint_done:
+            self.first_paint_done = True
+            print(f"首次绘制耗时: {time.perf_counter() - _START_TIME:.3f} 秒")
     
     def load_data(self):
-        """加载数据文件"""
-        try:
-            # 读取数据
-            data = []
-            with open('filtered_comments.txt', 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip():
-                        parts = line.strip().split('\t')
-                        if len(parts) == 2:
-                            time_str, value_str = parts
-                            timestamp = datetime.strptime(time_str, '%Y-%m-%d %H:%M:%S')
-                            value = float(value_str)
-                            data.append((timestamp, value))
-            
-            # 转换为DataFrame
-            self.data = pd.DataFrame(data, columns=['time', 'value'])
-            self.data = self.data.sort_values('time')
-            
-            # 创建数值型时间轴（从第一个时间点开始的小时数）
-            start_time = self.data['time'].iloc[0]
-            self.data['hours'] = (self.data['time'] - start_time).dt.total_seconds() / 3600
-            
-            # 更新信息显示
-            info_text = f"数据点数量: {len(self.data)}\n"
-            info_text += f"时间范围: {self.data['time'].iloc[0].strftime('%Y-%m-%d %H:%M')}\n"
-            info_text += f"至 {self.data['time'].iloc[-1].strftime('%Y-%m-%d %H:%M')}\n"
-            info_text += f"数值范围: {self.data['value'].min():.1f} - {self.data['value'].max():.1f}"
-            self.info_label.config(text=info_text)
-            
-            # 绘制原始数据
-            self.plot_data()
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"加载数据失败: {str(e)}")
+        """在后台线程加载数据文件"""
+        def worker():
+            try:
+                self.load_queue.put(('ok', load_series()))
+            except Exception as e:
+                self.load_queue.put(('error', e))
+        
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(20, self.poll_load_result)
     
-    def plot_data(self):
-        """绘制数据图表"""
-        self.ax.clear()
+    def poll_load_result(self):
+        """轮询后台加载结果，Tk组件只在主线程中更新"""
+        try:
+            status, result = self.load_queue.get_nowait()
+        except queue.Empty:
+            self.root.after(20, self.poll_load_result)
+            return
+        
+        if status == 'error':
+            messagebox.showerror("错误", f"加载数据失败: {str(result)}")
+            return
+        if len(result) == 0:
+            messagebox.showerror("错误", "加载数据失败: 数据文件为空")
+            return
         
-        # 绘制原始数据点
-        self.ax.scatter(self.data['hours'], self.data['value'], 
-                       alpha=0.6, s=20, color='blue', label='原始数据')
+        self.data = result
+        print(f"数据加载完成: {len(self.data)} 条, 耗时 {time.perf_counter() - _START_TIME:.3f} 秒")
         
-        # 如果有拟合函数，绘制拟合曲线
-        if self.fitted_func is not None:
-            x_smooth = np.linspace(self.data['hours'].min(), 
-                                 self.data['hours'].max(), 1000)
-            y_smooth = self.fitted_func(x_smooth, *self.fitted_params)
-            self.ax.plot(x_smooth, y_smooth, 'r-', linewidth=2, label='拟合曲线')
+        # 更新信息显示
+        info_text = f"数据点数量: {len(self.data)}\n"
+        info_text += f"时间范围: {self.data['time'].iloc[0].strftime('%Y-%m-%d %H:%M')}\n"
+        info_text += f"至 {self.data['time'].iloc[-1].strftime('%Y-%m-%d %H:%M')}\n"
+        info_text += f"数值范围: {self.data['value'].min():.1f} - {self.data['value'].max():.1f}"
+        self.info_label.config(text=info_text)
+        
+        # 绘制原始数据（图表尚未创建时由create_chart负责绘制）
+        if self.canvas is not None:
+            self.plot_data()
+    
+    def create_artists(self):
+        """创建散点、拟合曲线和预测点等持久化图形元素"""
+        self.scatter = self.ax.scatter([], [], alpha=0.6, s=20, color='blue', label='原始数据')
+        self.fit_line, = self.ax.plot([], [], 'r-', linewidth=2, label='拟合曲线')
+        # 预测点使用animated，单独通过blit重绘
+        self.predict_marker, = self.ax.plot([], [], linestyle='none', marker='*', color='red',
+                                            markersize=12, label='预测点', animated=True)
         
         self.ax.set_xlabel('时间 (从开始时间的小时数)')
         self.ax.set_ylabel('数值')
         self.ax.set_title('数据可视化与函数拟合')
-        self.ax.legend()
         self.ax.grid(True, alpha=0.3)
         
-        self.canvas.draw()
-    
-    # 衰减函数定义
-    def exponential_decay_func(self, t, a, lam, c):
-        """指数衰减函数: y = a * e^(-λt) + c"""
-        return a * np.exp(-lam * t) + c
+        # 缩放/平移时按可见范围重新计算拟合曲线
+        self.ax.callbacks.connect('xlim_changed', self.on_xlim_changed)
+        self.canvas.mpl_connect('draw_event', self.on_draw)
     
-    def linear_decay_func(self, t, a, b):
-        """线性衰减函数: y = a - bt"""
-        return a - b * t
-    
-    def polynomial_decay_func(self, t, a, n, c):
-        """多项式衰减函数: y = a * t^(-n) + c"""
-        return a * np.power(t + 1, -n) + c  # +1避免t=0时的问题
+    def plot_data(self):
+        """绘制数据图表，原地更新已有图形元素而不是清空重绘"""
+        if self.scatter is None:
+            self.create_artists()
+        
+        x = self.data['hours'].values
+        y = self.data['value'].values
+        self.scatter.set_offsets(np.column_stack([x, y]))
+        
+        # 手动设置坐标范围（散点集合不参与relim）
+        x_margin = (x.max() - x.min()) * 0.05 or 1
+        y_margin = (y.max() - y.min()) * 0.05 or 1
+        self.ax.set_ylim(y.min() - y_margin, y.max() + y_margin)
+        self.ax.set_xlim(x.min() - x_margin, x.max() + x_margin)  # 触发拟合曲线更新
+        self.update_fit_curve()
+        
+        # 重新拟合后清除旧的预测点
+        self.predict_marker.set_data([], [])
+        
+        handles = [self.scatter]
+        if self.fitted_func is not None:
+            handles.append(self.fit_line)
+        self.ax.legend(handles=handles)
+        
+        self.canvas.draw()
+        self.report_first_paint()
     
-    def gaussian_decay_func(self, t, a, mu, sigma, c):
-        """高斯衰减函数: y = a * e^(-(t-μ)²/(2σ²)) + c"""
-        return a * np.exp(-((t - mu) ** 2) / (2 * sigma ** 2)) + c
+    def update_fit_curve(self):
+        """只在当前可见的x范围内、按屏幕像素分辨率计算拟合曲线"""
+        if self.fitted_func is None:
+            self.fit_line.set_data([], [])
+            return
+        
+        x_min, x_max = self.ax.get_xlim()
+        num_points = max(int(self.ax.bbox.width), 2)
+        x_smooth = np.linspace(x_min, x_max, num_points)
+        with np.errstate(all='ignore'):
+            y_smooth = self.fitted_func(x_smooth, *self.fitted_params)
+        self.fit_line.set_data(x_smooth, y_smooth)
     
-    def logarithmic_decay_func(self, t, a, b):
-        """对数衰减函数: y = a - b * ln(t+1)"""
-        return a - b * np.log(t + 1)  # +1避免t=0时的问题
+    def on_xlim_changed(self, ax):
+        """x轴范围变化回调"""
+        self.update_fit_curve()
     
-    def power_decay_func(self, t, a, r, c):
-        """幂函数衰减: y = a * (1-r)^t + c"""
-        return a * np.power(1 - r, t) + c
+    def on_draw(self, event):
+        """完整重绘后缓存背景，并补画animated的预测点"""
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.predict_marker)
     
-    def polynomial_func(self, x, *params):
-        """多项式函数"""
-        return sum(p * x**i for i, p in enumerate(params))
+    def show_prediction(self, hours, value):
+        """替换图上的预测点，优先使用blit局部刷新"""
+        self.predict_marker.set_data([hours], [value])
+        
+        x_min, x_max = self.ax.get_xlim()
+        y_min, y_max = self.ax.get_ylim()
+        visible = x_min <= hours <= x_max and y_min <= value <= y_max
+        
+        if self.background is None or not visible:
+            # 预测点超出当前视图时扩展坐标范围并完整重绘
+            if not visible:
+                x_pad = (x_max - x_min) * 0.05
+                y_pad = (y_max - y_min) * 0.05
+                self.ax.set_ylim(min(y_min, value - y_pad), max(y_max, value + y_pad))
+                self.ax.set_xlim(min(x_min, hours - x_pad), max(x_max, hours + x_pad))
+            self.canvas.draw()
+            return
+        
+        self.canvas.restore_region(self.background)
+        self.ax.draw_artist(self.predict_marker)
+        self.canvas.blit(self.ax.bbox)
     
     def fit_function(self):
         """执行函数拟合"""
@@ -221,70 +303,22 @@ class DataVisualizer:
             x = self.data['hours'].values
             y = self.data['value'].values
             
-            fit_type = self.fit_type.get()
-            
-            if fit_type == "exponential_decay":
-                # 指数衰减拟合
-                initial_guess = [y[0] - y[-1], 0.01, y[-1]]
-                popt, _ = curve_fit(self.exponential_decay_func, x, y, 
-                                  p0=initial_guess, maxfev=5000)
-                self.fitted_params = popt
-                self.fitted_func = self.exponential_decay_func
-                y_pred = self.exponential_decay_func(x, *popt)
-                
-            elif fit_type == "linear_decay":
-                # 线性衰减拟合
-                popt, _ = curve_fit(self.linear_decay_func, x, y)
-                self.fitted_params = popt
-                self.fitted_func = self.linear_decay_func
-                y_pred = self.linear_decay_func(x, *popt)
-                
-            elif fit_type == "polynomial_decay":
-                # 多项式衰减拟合
-                initial_guess = [1000, 0.5, y[-1]]
-                popt, _ = curve_fit(self.polynomial_decay_func, x, y, 
-                                  p0=initial_guess, maxfev=5000)
-                self.fitted_params = popt
-                self.fitted_func = self.polynomial_decay_func
-                y_pred = self.polynomial_decay_func(x, *popt)
-                
-            elif fit_type == "gaussian_decay":
-                # 高斯衰减拟合
-                initial_guess = [y[0] - y[-1], x[0], np.std(x), y[-1]]
-                popt, _ = curve_fit(self.gaussian_decay_func, x, y, 
-                                  p0=initial_guess, maxfev=5000)
-                self.fitted_params = popt
-                self.fitted_func = self.gaussian_decay_func
-                y_pred = self.gaussian_decay_func(x, *popt)
+            # 拟合（多项式使用界面选择的阶数）
+            if self.seasonal_var.get():
+                # 趋势模型拟合去周期后的序列，预测时再加回周期分量
+                from seasonal_decompose import decompose
                 
-            elif fit_type == "logarithmic_decay":
-                # 对数衰减拟合
-                popt, _ = curve_fit(self.logarithmic_decay_func, x, y)
-                self.fitted_params = popt
-                self.fitted_func = self.logarithmic_decay_func
-                y_pred = self.logarithmic_decay_func(x, *popt)
-                
-            elif fit_type == "power_decay":
-                # 幂函数衰减拟合
-                initial_guess = [y[0] - y[-1], 0.01, y[-1]]
-                popt, _ = curve_fit(self.power_decay_func, x, y, 
-                                  p0=initial_guess, maxfev=5000)
-                self.fitted_params = popt
-                self.fitted_func = self.power_decay_func
-                y_pred = self.power_decay_func(x, *popt)
-                
-            elif fit_type == "polynomial":
-                # 传统多项式拟合
-                degree = self.degree_var.get()
-                coeffs = np.polyfit(x, y, degree)
-                self.fitted_params = coeffs
-                self.fitted_func = lambda x, *params: np.polyval(params, x)
-                y_pred = np.polyval(coeffs, x)
+                self.decomposition = decompose(x, y, self.fit_type.get(), degree=self.degree_var.get())
+                self.fitted_func = self.decomposition.model_func
+                self.fitted_params = self.decomposition.trend_params
+            else:
+                self.decomposition = None
+                self.fitted_func, self.fitted_params = fit_model(
+                    self.fit_type.get(), x, y, degree=self.degree_var.get())
+            y_pred = self.fitted_func(x, *self.fitted_params)
             
             # 计算R²
-            ss_res = np.sum((y - y_pred) ** 2)
-            ss_tot = np.sum((y - np.mean(y)) ** 2)
-            self.r_squared = 1 - (ss_res / ss_tot)
+            self.r_squared = r_squared(y, y_pred)
             
             # 显示拟合结果
             self.display_fit_results()
@@ -355,11 +389,19 @@ class DataVisualizer:
                 decay_rate = -b / (current_time + 1)
                 result_text += f"当前时刻衰减速度: {decay_rate:.6f} 单位/小时\n"
         
+        if self.decomposition is not None:
+            seasonal = self.decomposition.seasonal
+            result_text += "\n周期分量（已加入预测）:\n"
+            if not seasonal.periods:
+                result_text += "数据跨度不足两天，未估计周期分量\n"
+            for period in sorted(set(seasonal.periods)):
+                result_text += f"{period}小时周期振幅: {seasonal.amplitude(period):.2f}万\n"
+        
         self.result_text.insert(1.0, result_text)
     
     def predict_value(self):
         """预测数值"""
-        if self.fitted_func is None:
+        if self.fitted_func is None or self.canvas is None:
             messagebox.showerror("错误", "请先执行函数拟合")
             return
         
@@ -372,21 +414,15 @@ class DataVisualizer:
             start_time = self.data['time'].iloc[0]
             hours = (target_time - start_time).total_seconds() / 3600
             
-            # 预测数值
-            if self.fit_type.get() == "polynomial":
-                predicted_value = np.polyval(self.fitted_params, hours)
-            else:
-                predicted_value = self.fitted_func(hours, *self.fitted_params)
+            # 预测数值（启用周期分解时包含周期分量）
+            predicted_value = float(self.fitted_func(hours, *self.fitted_params))
             
             # 显示结果（单位为万）
             result_text = f"预测结果: {predicted_value:.2f}万"
             self.predict_label.config(text=result_text)
             
-            # 在图表上标记预测点
-            self.ax.scatter([hours], [predicted_value], color='red', s=100, 
-                          marker='*', label=f'预测点 ({predicted_value:.2f}万)')
-            self.ax.legend()
-            self.canvas.draw()
+            # 在图表上标记预测点（替换上一次的预测点）
+            self.show_prediction(hours, predicted_value)
             
         except ValueError as e:
             messagebox.showerror("错误", "时间格式错误，请使用 YYYY-MM-DD HH:MM:SS 格式")
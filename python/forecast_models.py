@@ -0,0 +1,120 @@
+import os
+import pickle
+import numpy as np
+
+DATA_FILE = 'filtered_comments.txt'
+
+def default_cache_file(data_file):
+    """数据文件对应的缓存路径，如 filtered_comments.txt -> .filtered_comments.cache.pkl"""
+    directory, name = os.path.split(data_file)
+    return os.path.join(directory, f".{os.path.splitext(name)[0]}.cache.pkl")
+
+def load_series(data_file=DATA_FILE, cache_file=None):
+    """读取时间序列数据，文本文件未变化时直接使用缓存的解析结果"""
+    import pandas as pd
+
+    if cache_file is None:
+        cache_file = default_cache_file(data_file)
+    stat = os.stat(data_file)
+    cache_key = (os.path.abspath(data_file), stat.st_mtime_ns, stat.st_size)
+
+    # 缓存命中：文件路径、修改时间和大小都未变化
+    try:
+        with open(cache_file, 'rb') as f:
+            cached = pickle.load(f)
+        if cached.get('key') == cache_key:
+            return cached['data']
+    except Exception:
+        pass
+
+    # 整列解析，避免逐行调用strptime
+    data = pd.read_csv(data_file, sep='\t', header=None, names=['time', 'value'],
+                       dtype={'time': str}, skip_blank_lines=True,
+                       on_bad_lines='skip', encoding='utf-8')
+    data['time'] = pd.to_datetime(data['time'], format='%Y-%m-%d %H:%M:%S', errors='coerce')
+    data['value'] = pd.to_numeric(data['value'], errors='coerce')
+    data = data.dropna().sort_values('time', kind='mergesort').reset_index(drop=True)
+
+    # 创建数值型时间轴（从第一个时间点开始的小时数）
+    if len(data) > 0:
+        start_time = data['time'].iloc[0]
+        data['hours'] = (data['time'] - start_time).dt.total_seconds() / 3600
+    else:
+        data['hours'] = []
+
+    try:
+        with open(cache_file, 'wb') as f:
+            pickle.dump({'key': cache_key, 'data': data}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        print(f"写入缓存失败: {e}")
+
+    return data
+
+# 衰减函数定义
+def exponential_decay_func(t, a, lam, c):
+    """指数衰减函数: y = a * e^(-λt) + c"""
+    return a * np.exp(-lam * t) + c
+
+def linear_decay_func(t, a, b):
+    """线性衰减函数: y = a - bt"""
+    return a - b * t
+
+def polynomial_decay_func(t, a, n, c):
+    """多项式衰减函数: y = a * t^(-n) + c"""
+    return a * np.power(t + 1, -n) + c  # +1避免t=0时的问题
+
+def gaussian_decay_func(t, a, mu, sigma, c):
+    """高斯衰减函数: y = a * e^(-(t-μ)²/(2σ²)) + c"""
+    return a * np.exp(-((t - mu) ** 2) / (2 * sigma ** 2)) + c
+
+def logarithmic_decay_func(t, a, b):
+    """对数衰减函数: y = a - b * ln(t+1)"""
+    return a - b * np.log(t + 1)  # +1避免t=0时的问题
+
+def power_decay_func(t, a, r, c):
+    """幂函数衰减: y = a * (1-r)^t + c"""
+    return a * np.power(1 - r, t) + c
+
+def polynomial_func(x, *params):
+    """多项式函数（系数从高次到低次，与np.polyfit一致）"""
+    return np.polyval(params, x)
+
+MODEL_FUNCS = {
+    'exponential_decay': exponential_decay_func,
+    'linear_decay': linear_decay_func,
+    'polynomial_decay': polynomial_decay_func,
+    'gaussian_decay': gaussian_decay_func,
+    'logarithmic_decay': logarithmic_decay_func,
+    'power_decay': power_decay_func,
+    'polynomial': polynomial_func,
+}
+
+def initial_guess(fit_type, x, y):
+    """各模型的初始参数估计，返回None时由curve_fit使用默认值"""
+    if fit_type in ('exponential_decay', 'power_decay'):
+        return [y[0] - y[-1], 0.01, y[-1]]
+    if fit_type == 'polynomial_decay':
+        return [1000, 0.5, y[-1]]
+    if fit_type == 'gaussian_decay':
+        return [y[0] - y[-1], x[0], np.std(x), y[-1]]
+    return None
+
+def fit_model(fit_type, x, y, degree=3, p0=None):
+    """拟合指定模型，返回 (函数, 参数)；p0可用于热启动"""
+    if fit_type == 'polynomial':
+        return polynomial_func, np.polyfit(x, y, degree)
+
+    # 仅在执行拟合时导入scipy
+    from scipy.optimize import curve_fit
+
+    func = MODEL_FUNCS[fit_type]
+    if p0 is None:
+        p0 = initial_guess(fit_type, x, y)
+    popt, _ = curve_fit(func, x, y, p0=p0, maxfev=5000)
+    return func, popt
+
+def r_squared(y, y_pred):
+    """计算决定系数R²"""
+    ss_res = np.sum((y - y_pred) ** 2)
+    ss_tot = np.sum((y - np.mean(y)) ** 2)
+    return 1 - (ss_res / ss_tot)
@@ -0,0 +1,262 @@
+import argparse
+import math
+from datetime import datetime
+from csv_processor_improved import calculate_confidence
+
+DEFAULT_CONFIDENCE = 100  # 没有原评论时使用的置信度
+ORIGINAL_FILE = 'filtered_comments_with_original.txt'  # csv_processor_improved输出的带原评论文件
+
+class KalmanTracker:
+    """局部线性趋势（水平 + 漂移）卡尔曼滤波器，逐条报数O(1)更新
+
+    状态为 [水平(万), 漂移(万/小时)]，时间以小时为单位。
+    观测噪声由calculate_confidence的置信度决定：置信度越高，噪声越小。
+    """
+
+    def __init__(self, level_noise=0.05, drift_noise=0.5, obs_std=1.0,
+                 initial_drift_std=10.0, gate_sigma=5.0, keep_history=False):
+        self.level_noise = level_noise    # 水平的随机游走噪声（万/√小时）
+        self.drift_noise = drift_noise    # 漂移的随机游走噪声（万/小时/√小时）
+        self.obs_std = obs_std            # 置信度为100时的观测标准差（万）
+        self.initial_drift_std = initial_drift_std
+        self.gate_sigma = gate_sigma      # 新息超过该倍数标准差的报数视为异常，不参与更新
+        self.keep_history = keep_history  # 保留每步结果以便离线RTS平滑
+
+        self.time = None  # 最近一次更新的时间（小时）
+        self.x = None     # 状态 [水平, 漂移]
+        self.P = None     # 协方差 [[p00, p01], [p01, p11]]
+        self.rejected = 0
+        self.history = []
+
+    def observation_variance(self, confidence):
+        """根据置信度计算观测方差"""
+        confidence = DEFAULT_CONFIDENCE if confidence is None else confidence
+        std = self.obs_std * DEFAULT_CONFIDENCE / max(confidence, 10)
+        return std * std
+
+    def predict_state(self, dt):
+        """将当前状态向前推进dt小时，返回 (状态, 协方差)"""
+        level, drift = self.x
+        (p00, p01), (_, p11) = self.P
+
+        x = (level + drift * dt, drift)
+
+        # P = F P F' + Q，F = [[1, dt], [0, 1]]
+        q_drift = self.drift_noise ** 2
+        q00 = self.level_noise ** 2 * dt + q_drift * dt ** 3 / 3
+        q01 = q_drift * dt ** 2 / 2
+        q11 = q_drift * dt
+        n00 = p00 + 2 * dt * p01 + dt * dt * p11 + q00
+        n01 = p01 + dt * p11 + q01
+        n11 = p11 + q11
+        return x, ((n00, n01), (n01, n11))
+
+    def update(self, hours, value, confidence=None):
+        """处理一条报数，返回是否被接受"""
+        r = self.observation_variance(confidence)
+
+        if self.x is None:
+            self.time = hours
+            self.x = (value, 0.0)
+            self.P = ((r, 0.0), (0.0, self.initial_drift_std ** 2))
+            self._record(hours, self.x, self.P, self.x, self.P, 0.0)
+            return True
+
+        dt = max(hours - self.time, 0.0)
+        x_pred, P_pred = self.predict_state(dt)
+        (p00, p01), (_, p11) = P_pred
+
+        # 新息及其方差，H = [1, 0]
+        innovation = value - x_pred[0]
+        s = p00 + r
+        if abs(innovation) > self.gate_sigma * math.sqrt(s):
+            self.rejected += 1
+            return False
+
+        k0 = p00 / s
+        k1 = p01 / s
+        x = (x_pred[0] + k0 * innovation, x_pred[1] + k1 * innovation)
+        P = ((p00 - k0 * p00, p01 - k0 * p01),
+             (p01 - k0 * p01, p11 - k1 * p01))
+
+        self._record(hours, x_pred, P_pred, x, P, dt)
+        self.time, self.x, self.P = hours, x, P
+        return True
+
+    def _record(self, hours, x_pred, P_pred, x, P, dt):
+        if self.keep_history:
+            self.history.append((hours, x_pred, P_pred, x, P, dt))
+
+    @property
+    def level(self):
+        """当前滤波后的粉丝数（万）"""
+        return self.x[0]
+
+    @property
+    def decay_rate(self):
+        """当前掉粉速度（万/小时，正数表示下降）"""
+        return -self.x[1]
+
+    def forecast(self, hours_ahead):
+        """预测hours_ahead小时后的粉丝数，返回 (均值, 方差)"""
+        x, P = self.predict_state(hours_ahead)
+        return x[0], P[0][0]
+
+    def smooth(self):
+        """RTS平滑（需要keep_history=True），返回 [(时间, 水平, 水平方差, 漂移)]"""
+        if not self.history:
+            return []
+
+        hours, _, _, x_s, P_s, _ = self.history[-1]
+        smoothed = [(hours, x_s[0], P_s[0][0], x_s[1])]
+
+        for k in range(len(self.history) - 2, -1, -1):
+            hours, _, _, x_f, P_f, _ = self.history[k]
+            _, x_p, P_p, _, _, dt = self.history[k + 1]
+
+            # C = P_f F' P_p^-1
+            (f00, f01), (_, f11) = P_f
+            (p00, p01), (_, p11) = P_p
+            a00, a01, a10, a11 = f00 + dt * f01, f01, f01 + dt * f11, f11
+            det = p00 * p11 - p01 * p01
+            i00, i01, i11 = p11 / det, -p01 / det, p00 / det
+            c00 = a00 * i00 + a01 * i01
+            c01 = a00 * i01 + a01 * i11
+            c10 = a10 * i00 + a11 * i01
+            c11 = a10 * i01 + a11 * i11
+
+            # x_s = x_f + C (x_s(k+1) - x_p)
+            d0, d1 = x_s[0] - x_p[0], x_s[1] - x_p[1]
+            x_new = (x_f[0] + c00 * d0 + c01 * d1, x_f[1] + c10 * d0 + c11 * d1)
+
+            # P_s = P_f + C (P_s(k+1) - P_p) C'
+            (s00, s01), (_, s11) = P_s
+            e00, e01, e11 = s00 - p00, s01 - p01, s11 - p11
+            m00 = c00 * e00 + c01 * e01
+            m01 = c00 * e01 + c01 * e11
+            m10 = c10 * e00 + c11 * e01
+            m11 = c10 * e01 + c11 * e11
+            n00 = f00 + m00 * c00 + m01 * c01
+            n01 = f01 + m00 * c10 + m01 * c11
+            n11 = f11 + m10 * c10 + m11 * c11
+
+            x_s, P_s = x_new, ((n00, n01), (n01, n11))
+            smoothed.append((hours, x_s[0], P_s[0][0], x_s[1]))
+
+        smoothed.reverse()
+        return smoothed
+
+def load_confidences(original_file=ORIGINAL_FILE):
+    """读取带原评论的文件，返回 {(时间字符串, 数值): 置信度}；文件不存在时返回空字典"""
+    confidences = {}
+    try:
+        with open(original_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.rstrip('\n').split('\t')
+                if len(parts) < 3:
+                    continue
+                try:
+                    value = float(parts[1])
+                except ValueError:
+                    continue
+                confidences[(parts[0], value)] = calculate_confidence(parts[2], value)
+    except FileNotFoundError:
+        print(f"未找到 {original_file}，观测噪声使用默认置信度")
+    return confidences
+
+def load_reports(data_file='filtered_comments.txt', original_file=ORIGINAL_FILE):
+    """读取报数序列（与convert_data相同的格式），返回 [(时间, 数值, 置信度)]
+
+    行中带有原评论时直接按原评论计算置信度；否则按 (时间, 数值) 在original_file中查找原评论，
+    找不到时置信度为None（使用DEFAULT_CONFIDENCE）。
+    """
+    confidences = load_confidences(original_file) if original_file else {}
+    reports = []
+    with open(data_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.rstrip('\n').split('\t')
+            if len(parts) < 2:
+                continue
+            try:
+                timestamp = datetime.strptime(parts[0], '%Y-%m-%d %H:%M:%S')
+                value = float(parts[1])
+            except ValueError:
+                continue
+            if len(parts) >= 3:
+                confidence = calculate_confidence(parts[2], value)
+            else:
+                confidence = confidences.get((parts[0], value))
+            reports.append((timestamp, value, confidence))
+    reports.sort(key=lambda r: r[0])
+    return reports
+
+def track_reports(reports, smooth=False, forecast_hours=24, **tracker_options):
+    """对报数序列运行滤波（可选RTS平滑），返回可写入data.js的结果字典"""
+    if not reports:
+        return None
+
+    tracker = KalmanTracker(keep_history=smooth, **tracker_options)
+    start_time = reports[0][0]
+    filtered = []
+    for timestamp, value, confidence in reports:
+        hours = (timestamp - start_time).total_seconds() / 3600
+        if tracker.update(hours, value, confidence):
+            filtered.append((timestamp, tracker.level, tracker.P[0][0], tracker.x[1]))
+
+    if smooth:
+        # 平滑结果与被接受的报数一一对应
+        filtered = [(timestamp, level, var, drift) for (timestamp, _, _, _), (_, level, var, drift)
+                    in zip(filtered, tracker.smooth())]
+
+    last_time = filtered[-1][0]
+    series = [{
+        'timestamp': timestamp.isoformat(),
+        'time': int(timestamp.timestamp() * 1000),
+        'level': round(level, 3),
+        'std': round(math.sqrt(max(var, 0.0)), 4),
+        'drift': round(drift, 5),
+    } for timestamp, level, var, drift in filtered]
+
+    forecast = []
+    for h in range(1, forecast_hours + 1):
+        mean, var = tracker.forecast(h)
+        forecast.append({
+            'time': int(last_time.timestamp() * 1000) + h * 3600 * 1000,
+            'mean': round(mean, 3),
+            'std': round(math.sqrt(var), 4),
+        })
+
+    return {
+        'method': 'rts_smoother' if smooth else 'kalman_filter',
+        'level': round(tracker.level, 3),
+        'level_std': round(math.sqrt(tracker.P[0][0]), 4),
+        'decay_rate': round(tracker.decay_rate, 5),
+        'rejected': tracker.rejected,
+        'series': series,
+        'forecast': forecast,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='卡尔曼滤波实时粉丝数追踪')
+    parser.add_argument('--data', default='filtered_comments.txt', help='报数序列文件')
+    parser.add_argument('--original', default=ORIGINAL_FILE, help='带原评论的文件，用于计算观测置信度')
+    parser.add_argument('--smooth', action='store_true', help='离线运行RTS平滑')
+    parser.add_argument('--forecast-hours', type=int, default=24, help='预测小时数')
+    args = parser.parse_args()
+
+    result = track_reports(load_reports(args.data, args.original), smooth=args.smooth,
+                           forecast_hours=args.forecast_hours)
+    if result is None:
+        print("没有可用的报数数据")
+        return
+
+    print(f"方法: {result['method']}")
+    print(f"报数: {len(result['series'])} 条 (剔除异常 {result['rejected']} 条)")
+    print(f"当前粉丝数: {result['level']:.2f} ± {result['level_std']:.2f} 万")
+    print(f"当前掉粉速度: {result['decay_rate']:.4f} 万/小时")
+    for item in result['forecast'][:args.forecast_hours:6]:
+        hours = (item['time'] - result['series'][-1]['time']) / 3600000
+        print(f"  {hours:.0f} 小时后: {item['mean']:.2f} ± {item['std']:.2f} 万")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import math
+import numpy as np
+
+# 与js/chart.js中的浏览器端拟合保持一致：时间单位为天，起点为第一个数据点
+MS_PER_DAY = 1000 * 60 * 60 * 24
+MS_PER_HOUR = 1000 * 60 * 60
+Z_95 = 1.96  # 95%预测区间
+
+def _regression(x, y):
+    """一元线性回归，返回 (斜率, 截距, 预测区间所需的统计量) ；失败时返回None"""
+    n = len(x)
+    x_mean = x.mean()
+    sxx = np.sum((x - x_mean) ** 2)
+    if n < 3 or sxx < 1e-10:
+        return None
+    slope = np.sum((x - x_mean) * (y - y.mean())) / sxx
+    intercept = y.mean() - slope * x_mean
+    residual_std = math.sqrt(np.sum((y - (slope * x + intercept)) ** 2) / (n - 2))
+    return slope, intercept, (n, x_mean, sxx, residual_std)
+
+def _interval_halfwidth(x0, stats):
+    """新观测值的预测区间半宽"""
+    n, x_mean, sxx, residual_std = stats
+    return Z_95 * residual_std * np.sqrt(1 + 1 / n + (x0 - x_mean) ** 2 / sxx)
+
+def _r_squared(y, y_pred):
+    ss_total = np.sum((y - y.mean()) ** 2)
+    return 1 - np.sum((y - y_pred) ** 2) / ss_total if ss_total > 0 else 0.0
+
+def fit_linear(x, y):
+    """线性回归 y = slope * x + intercept"""
+    result = _regression(x, y)
+    if result is None:
+        return None
+    slope, intercept, stats = result
+    r2 = max(0.0, _r_squared(y, slope * x + intercept))
+    return {
+        'slope': float(slope),
+        'intercept': float(intercept),
+        'r2': float(r2),
+        'equation': f"y = {slope:.6f}x + {intercept:.2f}",
+        '_stats': stats,
+    }
+
+def fit_exponential(x, y):
+    """指数衰减 y = a * e^(-λt) + c，与浏览器端相同：先移除|z|>4的极端值，再做对数线性回归"""
+    z_scores = np.abs((y - y.mean()) / y.std())
+    clean = z_scores <= 4
+    outlier_count = int(np.sum(~clean))
+    if np.sum(clean) < 10:
+        clean = np.ones_like(y, dtype=bool)
+        outlier_count = 0
+    x, y = x[clean], y[clean]
+
+    # 先尝试带偏移项c的模型，失败时退回无偏移项模型
+    for c in (float(y.min() * 0.9), 0.0):
+        adjusted = y - c
+        if np.any(adjusted <= 0):
+            continue
+        result = _regression(x, np.log(adjusted))
+        if result is None:
+            continue
+        slope, intercept, stats = result
+        a = math.exp(intercept)
+        lam = -slope
+        r2 = _r_squared(y, a * np.exp(-lam * x) + c)
+        if not (lam > 0 and a > 0 and r2 >= 0.1):
+            continue
+
+        equation = f"y = {a:.3f} * e^(-{lam:.6f} * t)"
+        if c:
+            equation += f" + {c:.3f}"
+        return {
+            'a': a,
+            'lam': lam,
+            'c': c,
+            'r2': float(r2),
+            'halfLife': math.log(2) / lam,
+            'currentDecayRate': float(-a * lam * math.exp(-lam * x[-1])),
+            'dataPoints': int(len(x)),
+            'outlierCount': outlier_count,
+            'equation': equation,
+            '_stats': stats,
+        }
+    return None
+
+def _linear_crossing(model, fans):
+    if model is None or model['slope'] == 0:
+        return None
+    return (fans - model['intercept']) / model['slope']
+
+def _exponential_crossing(model, fans):
+    """指数模型到达fans的时间（天）；fans不高于渐近线c时永远达不到，返回None"""
+    if model is None:
+        return None
+    value = fans - model['c']
+    if value <= 0:
+        return None
+    return -math.log(value / model['a']) / model['lam']
+
+def build_model_data(data, forecast_days=7, step_hours=1, milestone_step=50, milestone_count=5):
+    """根据FANS_DATA格式的数据计算模型参数、预测网格和里程碑时间，返回可写入data.js的字典"""
+    if len(data) < 10:
+        return None
+
+    times = np.array([d['time'] for d in data], dtype=np.float64)
+    fans = np.array([d['fans'] for d in data], dtype=np.float64)
+    start_time = times[0]
+    x = (times - start_time) / MS_PER_DAY
+
+    linear = fit_linear(x, fans)
+    exponential = fit_exponential(x, fans)
+
+    # 预测网格：从最后一个数据点开始，按小时向后
+    grid_times = times[-1] + np.arange(1, int(forecast_days * 24 / step_hours) + 1) * step_hours * MS_PER_HOUR
+    grid_x = (grid_times - start_time) / MS_PER_DAY
+    forecast = {'time': grid_times.astype(np.int64).tolist()}
+    if linear:
+        mean = linear['slope'] * grid_x + linear['intercept']
+        half = _interval_halfwidth(grid_x, linear['_stats'])
+        forecast['linear'] = np.round(mean, 3).tolist()
+        forecast['linearLower'] = np.round(mean - half, 3).tolist()
+        forecast['linearUpper'] = np.round(mean + half, 3).tolist()
+    if exponential:
+        a, lam, c = exponential['a'], exponential['lam'], exponential['c']
+        log_mean = math.log(a) - lam * grid_x
+        half = _interval_halfwidth(grid_x, exponential['_stats'])
+        forecast['exponential'] = np.round(c + np.exp(log_mean), 3).tolist()
+        forecast['exponentialLower'] = np.round(c + np.exp(log_mean - half), 3).tolist()
+        forecast['exponentialUpper'] = np.round(c + np.exp(log_mean + half), 3).tolist()
+
+    # 里程碑：最新粉丝数以下的整数关口
+    milestones = []
+    first_milestone = math.floor(fans[-1] / milestone_step) * milestone_step
+    for i in range(milestone_count):
+        target = first_milestone - i * milestone_step
+        item = {'fans': target}
+        for name, crossing in (('linear', _linear_crossing(linear, target)),
+                               ('exponential', _exponential_crossing(exponential, target))):
+            item[name] = int(start_time + crossing * MS_PER_DAY) if crossing is not None else None
+        milestones.append(item)
+
+    for model in (linear, exponential):
+        if model:
+            model.pop('_stats')
+
+    return {
+        'startTime': int(start_time),
+        'linear': linear,
+        'exponential': exponential,
+        'forecast': forecast,
+        'milestones': milestones,
+    }
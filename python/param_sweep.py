@@ -0,0 +1,228 @@
+import argparse
+import csv
+import glob
+import itertools
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone, timedelta
+import numpy as np
+from csv_processor_improved import contains_blocked_keywords, extract_number_from_comment
+
+# 特征矩阵的列
+FEATURES = [
+    'create_time',    # UTC时间戳
+    'number',         # 提取出的第一个数字
+    'num_count',      # 提取出的数字个数
+    'length',         # 评论长度
+    'chinese',        # 中文字符数
+    'pure_number',    # 纯数字格式（不带万/w）
+    'wan_number',     # 带万/w格式
+    'current',        # "目前"后跟数字
+    'report',         # 实时报数相关
+    'decimal',        # 数字带小数
+    'uncertain',      # 不确定词汇个数
+    'emoji',          # 包含表情/括号
+]
+COL = {name: i for i, name in enumerate(FEATURES)}
+
+UNCERTAIN_WORDS = ['大概', '约', '左右', '差不多', '估计', '可能', '应该']
+
+# 参数网格，默认值为csv_processor_improved中手工设定的数值
+PARAM_GRID = {
+    'max_length': [10, 12, 15, 18, 20],
+    'max_chinese': [3, 4, 5, 6, 7, 8],
+    'pure_weight': [20, 30, 40, 50],
+    'wan_weight': [15, 25, 35],
+    'current_weight': [10, 20, 30, 40],
+    'uncertain_penalty': [5, 15, 25],
+    'min_confidence': [0, 90, 100, 110, 120, 130],  # 置信度低于该值的记录不保留；0即当前行为
+}
+
+BEIJING_TZ = timezone(timedelta(hours=8))
+
+def extract_features(comment, create_time):
+    """计算单条评论的特征行；被屏蔽或不含数字的评论在任何参数下都无效，返回None"""
+    if contains_blocked_keywords(comment):
+        return None
+    numbers = extract_number_from_comment(comment)
+    if not numbers:
+        return None
+    number = numbers[0]
+
+    # 与calculate_confidence中的判断保持一致
+    number_str = str(number).rstrip('0').rstrip('.')
+    pure = number_str in comment and not re.search(f'{number_str}[万w]', comment)
+    wan = not pure and (f"{number}万" in comment or f"{number}w" in comment)
+
+    return (
+        int(create_time),
+        number,
+        len(numbers),
+        len(comment),
+        len(re.findall(r'[\u4e00-\u9fff]', comment)),
+        pure,
+        wan,
+        bool(re.search(r'目前.*?' + str(number), comment)),
+        bool(re.search(r'(实时报数|报数|下一位|继续报)', comment)),
+        '.' in str(number),
+        sum(1 for word in UNCERTAIN_WORDS if word in comment),
+        bool(re.search(r'[\[\]（）()【】]', comment)),
+    )
+
+def build_feature_matrix(csv_files):
+    """读取所有CSV，一次性计算特征矩阵"""
+    rows = []
+    for csv_file in csv_files:
+        try:
+            with open(csv_file, 'r', encoding='utf-8-sig') as f:
+                for row in csv.DictReader(f):
+                    try:
+                        features = extract_features(row['content'], row['create_time'])
+                    except (KeyError, ValueError):
+                        continue
+                    if features is not None:
+                        rows.append(features)
+        except Exception as e:
+            print(f"读取CSV文件 {csv_file} 时出错: {e}")
+    return np.array(rows, dtype=np.float64).reshape(-1, len(FEATURES))
+
+def load_reference(reference_file='filtered_comments_cleaned.txt'):
+    """读取清理后的序列作为评分基准，返回 (UTC时间戳, 数值)"""
+    times = []
+    values = []
+    with open(reference_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.strip().split('\t')
+            if len(parts) == 2:
+                local_time = datetime.strptime(parts[0], '%Y-%m-%d %H:%M:%S').replace(tzinfo=BEIJING_TZ)
+                times.append(local_time.timestamp())
+                values.append(float(parts[1]))
+    order = np.argsort(times)
+    return np.array(times)[order], np.array(values)[order]
+
+def restrict_reference(reference, features):
+    """只保留候选评论中存在相同时间戳的基准点，其余基准点在任何参数下都无法命中"""
+    ref_times, ref_values = reference
+    reachable = np.isin(ref_times, features[:, COL['create_time']])
+    return ref_times[reachable], ref_values[reachable]
+
+def score_config(features, reference, params, tolerance=1.0):
+    """对一组参数做向量化筛选和置信度计算，返回 (F1, 精确率, 召回率, 保留条数)
+
+    置信度既用于同一时间戳的去重，也通过min_confidence决定记录是否保留，因此各权重都会影响结果。
+    reference应先经过restrict_reference，召回率才以可命中的基准点为分母。
+    """
+    f = features
+
+    length = f[:, COL['length']]
+    length_bonus = np.select([length <= 8, length <= 12, length <= 15], [25, 15, 5], 0)
+    confidence = (50
+                  + params['pure_weight'] * f[:, COL['pure_number']]
+                  + params['wan_weight'] * f[:, COL['wan_number']]
+                  + params['current_weight'] * f[:, COL['current']]
+                  + 25 * f[:, COL['report']]
+                  + length_bonus
+                  + 20 * f[:, COL['decimal']]
+                  - params['uncertain_penalty'] * f[:, COL['uncertain']]
+                  - 10 * f[:, COL['emoji']])
+    confidence = np.maximum(confidence, 0)
+
+    mask = ((f[:, COL['length']] <= params['max_length'])
+            & (f[:, COL['num_count']] == 1)
+            & (f[:, COL['chinese']] <= params['max_chinese'])
+            & (confidence >= params.get('min_confidence', 0)))
+    selected = np.flatnonzero(mask)
+    if len(selected) == 0:
+        return 0.0, 0.0, 0.0, 0
+
+    # 同一时间戳只保留置信度最高的记录
+    times = f[selected, COL['create_time']]
+    order = np.lexsort((-confidence[selected], times))
+    selected = selected[order]
+    _, first = np.unique(f[selected, COL['create_time']], return_index=True)
+    selected = selected[first]
+
+    times = f[selected, COL['create_time']]
+    numbers = f[selected, COL['number']]
+    ref_times, ref_values = reference
+
+    # 精确率：保留记录与基准序列（插值）一致的比例
+    expected = np.interp(times, ref_times, ref_values)
+    precision = np.mean(np.abs(numbers - expected) <= tolerance)
+
+    # 召回率：基准序列中在同一时间有一致记录的比例
+    pos = np.clip(np.searchsorted(times, ref_times), 0, len(times) - 1)
+    hit = (times[pos] == ref_times) & (np.abs(numbers[pos] - ref_values) <= tolerance)
+    recall = np.mean(hit)
+
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall > 0 else 0.0
+    return float(f1), float(precision), float(recall), int(len(selected))
+
+# 子进程中共享的数据，由进程池初始化函数设置
+_worker_features = None
+_worker_reference = None
+
+def _init_worker(features, reference):
+    global _worker_features, _worker_reference
+    _worker_features = features
+    _worker_reference = reference
+
+def _score_chunk(configs):
+    return [(score_config(_worker_features, _worker_reference, params), params) for params in configs]
+
+def sweep(features, reference, grid=PARAM_GRID, workers=None, chunk_size=200):
+    """在进程池中评估所有参数组合，按F1（相同时按精确率）从高到低返回"""
+    names = list(grid)
+    configs = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    chunks = [configs[i:i + chunk_size] for i in range(0, len(configs), chunk_size)]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(features, reference)) as executor:
+        for chunk_results in executor.map(_score_chunk, chunks):
+            results.extend(chunk_results)
+
+    results.sort(key=lambda item: (item[0][0], item[0][1]), reverse=True)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='筛选规则参数搜索')
+    # 输出不用.csv后缀，避免被各脚本的 glob('*.csv') 当作评论数据读入
+    parser.add_argument('--output', default='param_sweep_results.tsv', help='结果输出文件（制表符分隔）')
+    args = parser.parse_args()
+
+    print("筛选规则参数搜索")
+    print("=" * 50)
+
+    start = time.perf_counter()
+    features = build_feature_matrix(glob.glob("*.csv"))
+    reference = load_reference()
+    total_reference = len(reference[0])
+    reference = restrict_reference(reference, features)
+    print(f"候选评论: {len(features)} 条, 基准数据点: {total_reference} 个 (可命中 {len(reference[0])} 个), "
+          f"特征计算耗时 {time.perf_counter() - start:.2f} 秒")
+
+    default_params = {'max_length': 15, 'max_chinese': 6, 'pure_weight': 40,
+                      'wan_weight': 25, 'current_weight': 30, 'uncertain_penalty': 15, 'min_confidence': 0}
+    f1, precision, recall, kept = score_config(features, reference, default_params)
+    print(f"当前参数: F1={f1:.4f} 精确率={precision:.4f} 召回率={recall:.4f} 保留 {kept} 条")
+
+    start = time.perf_counter()
+    results = sweep(features, reference, workers=os.cpu_count())
+    print(f"评估 {len(results)} 组参数, 耗时 {time.perf_counter() - start:.2f} 秒")
+
+    print("\n最优参数组合:")
+    for (f1, precision, recall, kept), params in results[:10]:
+        print(f"  F1={f1:.4f} 精确率={precision:.4f} 召回率={recall:.4f} 保留 {kept:4d} 条  {params}")
+
+    with open(args.output, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter='\t')
+        writer.writerow(list(PARAM_GRID) + ['f1', 'precision', 'recall', 'kept'])
+        for scores, params in results:
+            writer.writerow([params[name] for name in PARAM_GRID] + list(scores))
+    print(f"\n全部结果已保存到: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import argparse
+import numpy as np
+from forecast_models import DATA_FILE, MODEL_FUNCS, load_series, fit_model, r_squared
+
+DAY_HOURS = 24
+WEEK_HOURS = 24 * 7
+
+def resample_uniform(hours, values, step=0.25, max_gap=2.0, start=None, end=None):
+    """把不规则序列线性插值到等间距网格，返回 (网格, 插值结果, 有效掩码)
+
+    网格点所在的相邻观测间隔超过max_gap小时时视为缺口，掩码为False。
+    """
+    hours = np.asarray(hours, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    start = hours[0] if start is None else start
+    end = hours[-1] if end is None else end
+    grid = start + np.arange(int(np.floor((end - start) / step + 1e-9)) + 1) * step
+
+    resampled = np.interp(grid, hours, values)
+
+    # 每个网格点左右两侧最近的观测
+    right = np.clip(np.searchsorted(hours, grid, side='right'), 1, len(hours) - 1)
+    gap = hours[right] - hours[right - 1]
+    mask = (gap <= max_gap) & (grid >= hours[0]) & (grid <= hours[-1])
+    # 恰好落在观测点上的网格点始终有效
+    exact = hours[right - 1] == grid
+    mask |= exact
+    return grid, resampled, mask
+
+class SeasonalComponent:
+    """若干正弦谐波之和：s(t) = Σ a·cos(2πf(t-t0)) + b·sin(2πf(t-t0))"""
+
+    def __init__(self, origin=0.0, frequencies=(), cos_coefs=(), sin_coefs=(), periods=()):
+        self.origin = origin
+        self.frequencies = np.asarray(frequencies, dtype=np.float64)  # 周期/小时
+        self.cos_coefs = np.asarray(cos_coefs, dtype=np.float64)
+        self.sin_coefs = np.asarray(sin_coefs, dtype=np.float64)
+        self.periods = list(periods)  # 每个谐波所属的基本周期（小时）
+
+    def __call__(self, t):
+        t = np.asarray(t, dtype=np.float64)
+        if len(self.frequencies) == 0:
+            return np.zeros_like(t)
+        phase = 2 * np.pi * np.multiply.outer(t - self.origin, self.frequencies)
+        return np.cos(phase) @ self.cos_coefs + np.sin(phase) @ self.sin_coefs
+
+    def amplitude(self, period):
+        """某一基本周期（含其谐波）的峰峰值振幅"""
+        selected = np.array([p == period for p in self.periods], dtype=bool)
+        if not selected.any():
+            return 0.0
+        part = SeasonalComponent(self.origin, self.frequencies[selected],
+                                 self.cos_coefs[selected], self.sin_coefs[selected])
+        t = self.origin + np.linspace(0, period, 256, endpoint=False)
+        curve = part(t)
+        return float(curve.max() - curve.min())
+
+def seasonal_periods(span, daily_harmonics=3, weekly_harmonics=2):
+    """根据数据跨度决定可估计的周期：至少覆盖两个完整周期才估计该周期"""
+    periods = []
+    if span >= 2 * DAY_HOURS:
+        periods.append((DAY_HOURS, daily_harmonics))
+    if span >= 2 * WEEK_HOURS:
+        periods.append((WEEK_HOURS, weekly_harmonics))
+    return periods
+
+def extract_seasonal(hours, residual, step=0.25, max_gap=2.0, periods=None, iterations=10):
+    """用FFT从去趋势后的残差中提取日/周周期分量
+
+    取最近的整数个最长周期作为窗口，使各谐波恰好落在FFT频点上；
+    缺口处先填0，再用上一轮的周期估计迭代填补，每轮都是O(n log n)。
+    """
+    hours = np.asarray(hours, dtype=np.float64)
+    span = hours[-1] - hours[0]
+    if periods is None:
+        periods = seasonal_periods(span)
+    if not periods:
+        return SeasonalComponent(origin=hours[0])
+
+    longest = max(period for period, _ in periods)
+    window = np.floor(span / longest) * longest
+    start = hours[-1] - window
+    grid, resampled, mask = resample_uniform(hours, residual, step, max_gap, start=start)
+    grid, resampled, mask = grid[:-1], resampled[:-1], mask[:-1]  # 窗口为左闭右开
+    n = len(grid)
+
+    # 需要保留的频点：周期P的第k次谐波位于 k·window/P
+    bins = []
+    bin_periods = []
+    for period, harmonics in periods:
+        for k in range(1, harmonics + 1):
+            j = int(round(k * window / period))
+            if 0 < j < n // 2 and j not in bins:
+                bins.append(j)
+                bin_periods.append(period)
+    bins = np.array(bins, dtype=np.int64)
+    if len(bins) == 0:
+        return SeasonalComponent(origin=hours[0])
+
+    seasonal = np.zeros(n)
+    for _ in range(iterations if not mask.all() else 1):
+        spectrum = np.fft.rfft(np.where(mask, resampled, seasonal))
+        kept = np.zeros_like(spectrum)
+        kept[bins] = spectrum[bins]
+        seasonal = np.fft.irfft(kept, n)
+
+    # 频点j对应的分量为 (2/n)·(Re X·cos - Im X·sin)
+    return SeasonalComponent(
+        origin=grid[0],
+        frequencies=bins / (n * step),
+        cos_coefs=2 * spectrum[bins].real / n,
+        sin_coefs=-2 * spectrum[bins].imag / n,
+        periods=bin_periods,
+    )
+
+class SeasonalDecomposition:
+    """趋势 + 日/周周期分解的拟合结果"""
+
+    def __init__(self, fit_type, trend_func, trend_params, seasonal):
+        self.fit_type = fit_type
+        self.trend_func = trend_func
+        self.trend_params = trend_params
+        self.seasonal = seasonal
+
+    def model_func(self, t, *params):
+        """与forecast_models中的模型函数签名一致，可直接替换fitted_func"""
+        return self.trend_func(t, *params) + self.seasonal(t)
+
+    def predict(self, t):
+        return self.model_func(t, *self.trend_params)
+
+def decompose(hours, values, fit_type='exponential_decay', degree=3, step=0.25, max_gap=2.0,
+              iterations=2):
+    """交替估计趋势和周期分量（backfitting）
+
+    每轮先在扣除周期分量的序列上拟合趋势模型，再从趋势残差中提取周期分量，
+    最后在去周期的序列上重新拟合趋势。
+    """
+    hours = np.asarray(hours, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    seasonal = SeasonalComponent(origin=hours[0])
+    params = None
+
+    for _ in range(iterations):
+        func, params = fit_model(fit_type, hours, values - seasonal(hours), degree=degree, p0=params)
+        residual = values - func(hours, *params)
+        seasonal = extract_seasonal(hours, residual, step, max_gap)
+
+    func, params = fit_model(fit_type, hours, values - seasonal(hours), degree=degree, p0=params)
+    return SeasonalDecomposition(fit_type, func, params, seasonal)
+
+def main():
+    parser = argparse.ArgumentParser(description='掉粉速度的日/周周期分解')
+    parser.add_argument('--data', default=DATA_FILE, help='时间序列文件')
+    parser.add_argument('--step', type=float, default=0.25, help='重采样网格间隔（小时）')
+    parser.add_argument('--max-gap', type=float, default=2.0, help='超过该间隔（小时）视为缺口')
+    parser.add_argument('--models', nargs='*', default=['exponential_decay', 'linear_decay', 'polynomial'],
+                        choices=sorted(MODEL_FUNCS), help='趋势模型')
+    args = parser.parse_args()
+
+    data = load_series(args.data)
+    x = data['hours'].values
+    y = data['value'].values
+    print(f"数据点: {len(x)}, 跨度: {x[-1] - x[0]:.1f} 小时")
+
+    for fit_type in args.models:
+        try:
+            func, params = fit_model(fit_type, x, y)
+            result = decompose(x, y, fit_type, step=args.step, max_gap=args.max_gap)
+        except Exception as e:
+            print(f"{fit_type}: 拟合失败 ({e})")
+            continue
+        r2_trend = r_squared(y, func(x, *params))
+        r2_seasonal = r_squared(y, result.predict(x))
+        amplitudes = ", ".join(f"{period}小时周期振幅 {result.seasonal.amplitude(period):.2f}万"
+                               for period in sorted(set(result.seasonal.periods)))
+        print(f"{fit_type}: R² {r2_trend:.6f} -> {r2_seasonal:.6f}  {amplitudes or '数据跨度不足，未估计周期分量'}")
+
+if __name__ == "__main__":
+    main()
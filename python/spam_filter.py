@@ -0,0 +1,162 @@
+import re
+import random
+import zlib
+from collections import defaultdict, deque
+
+# 记录格式与csv_processor_improved一致:
+# (时间戳, 北京时间, 数字, 置信度, 评论, 用户ID)
+TIMESTAMP, COMMENT, USER_ID = 0, 4, 5
+
+# MinHash参数：32个哈希分为8个band，每个band 4行
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+_MERSENNE_PRIME = (1 << 61) - 1
+
+_rng = random.Random(20250728)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+                 for _ in range(NUM_PERM)]
+
+# 去掉数字后少于该长度的文本不参与近似重复检测（大多数有效评论只是报数本身）
+MIN_TEXT_LENGTH = 6
+
+def normalize_text(comment):
+    """去掉报数数字、表情、空白和标点，统一大小写，只保留用于比较相似度的其余文本"""
+    comment = re.sub(r'\[[^\]]*\]|【[^】]*】|（[^）]*）|\([^)]*\)', '', comment)  # 去掉[表情]等括号内容
+    comment = re.sub(r'\d+(?:\.\d+)?\s*[万wW]?', '', comment)  # 去掉数字及单位，否则报数相同即被视为重复
+    comment = re.sub(r'[\s，。！？、,.!?~～]+', '', comment)
+    return comment.lower()
+
+def shingles(comment, k=3):
+    """将文本切分为长度为k的字符片段集合"""
+    text = normalize_text(comment)
+    if len(text) <= k:
+        return {text}
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+def minhash_signature(shingle_set):
+    """计算MinHash签名"""
+    hashes = [zlib.crc32(s.encode('utf-8')) for s in shingle_set]
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+                 for a, b in _PERMUTATIONS)
+
+def estimate_similarity(sig1, sig2):
+    """用签名中相同位置的比例估计Jaccard相似度"""
+    return sum(1 for x, y in zip(sig1, sig2) if x == y) / NUM_PERM
+
+def limit_user_reports(records, max_reports=3, window_seconds=600):
+    """限制每个用户在时间窗口内的报数次数，返回 (保留记录, 被移除记录及原因)"""
+    kept = []
+    suppressed = []
+    recent = defaultdict(deque)  # 用户ID -> 窗口内已保留记录的时间戳
+
+    for record in sorted(records, key=lambda r: r[TIMESTAMP]):
+        user_id = record[USER_ID]
+        if not user_id:
+            kept.append(record)
+            continue
+
+        timestamps = recent[user_id]
+        while timestamps and record[TIMESTAMP] - timestamps[0] >= window_seconds:
+            timestamps.popleft()
+
+        if len(timestamps) >= max_reports:
+            suppressed.append((record, f"用户刷屏({window_seconds}秒内超过{max_reports}条)"))
+        else:
+            timestamps.append(record[TIMESTAMP])
+            kept.append(record)
+
+    return kept, suppressed
+
+def cluster_texts(records, threshold=0.8):
+    """用MinHash/LSH把近似相同的评论归为一簇，返回与records对应的簇编号（文本过短为None）
+
+    每条记录只和LSH桶中的代表记录比较，整体复杂度接近线性。
+    """
+    buckets = defaultdict(list)  # (band序号, band签名) -> 代表记录的簇编号
+    representatives = []  # 各簇代表记录的签名
+    clusters = []
+
+    for record in records:
+        if len(normalize_text(record[COMMENT])) < MIN_TEXT_LENGTH:
+            clusters.append(None)
+            continue
+
+        signature = minhash_signature(shingles(record[COMMENT]))
+        band_keys = [(band, signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+
+        # 在候选桶中寻找相似的代表记录
+        cluster = None
+        for key in band_keys:
+            for rep_index in buckets.get(key, ()):
+                if estimate_similarity(signature, representatives[rep_index]) >= threshold:
+                    cluster = rep_index
+                    break
+            if cluster is not None:
+                break
+
+        if cluster is None:
+            # 新的文本簇，当前记录作为代表
+            representatives.append(signature)
+            cluster = len(representatives) - 1
+            for key in band_keys:
+                buckets[key].append(cluster)
+        clusters.append(cluster)
+
+    return clusters
+
+def remove_near_duplicates(records, threshold=0.8, burst_seconds=300, min_users=3):
+    """移除复制粘贴刷屏：同一文本簇在burst_seconds内出现至少min_users个不同用户时视为一波复制粘贴
+
+    窗口内用户数降到min_users以下时该波结束，每波各保留最早的一条，其余移除；
+    每条记录只在越过阈值时扫描一次窗口，其余步骤只标记新记录。没有用户ID的记录不计入用户数。
+    """
+    records = sorted(records, key=lambda r: r[TIMESTAMP])
+    members = defaultdict(list)  # 簇编号 -> 记录下标（按时间排序）
+    for index, cluster in enumerate(cluster_texts(records, threshold)):
+        if cluster is not None:
+            members[cluster].append(index)
+
+    reasons = {}
+    for indexes in members.values():
+        # 双指针滑动窗口统计窗口内的不同用户数
+        users = defaultdict(int)
+        left = 0
+        wave_first = None  # 当前这一波保留的首条记录；窗口内用户数不足时该波结束
+        for right, index in enumerate(indexes):
+            if records[index][USER_ID]:
+                users[records[index][USER_ID]] += 1
+            while records[index][TIMESTAMP] - records[indexes[left]][TIMESTAMP] > burst_seconds:
+                user_id = records[indexes[left]][USER_ID]
+                if user_id:
+                    users[user_id] -= 1
+                    if users[user_id] == 0:
+                        del users[user_id]
+                left += 1
+
+            if len(users) < min_users:
+                wave_first = None
+                continue
+
+            if wave_first is None:
+                # 新的一波：窗口内尚未被移除的最早记录保留，其余标记
+                window = [i for i in indexes[left:right + 1] if i not in reasons]
+                wave_first, marked = window[0], window[1:]
+            else:
+                marked = [index]
+            reason = f"复制粘贴刷屏({burst_seconds}秒内{min_users}个以上用户, 首条: {records[wave_first][COMMENT]})"
+            for i in marked:
+                reasons[i] = reason
+
+    kept = [record for index, record in enumerate(records) if index not in reasons]
+    suppressed = [(records[index], reason) for index, reason in sorted(reasons.items())]
+    return kept, suppressed
+
+def suppress_spam(records, max_reports=3, window_seconds=600, threshold=0.8, burst_seconds=300, min_users=3):
+    """刷屏与复制粘贴评论抑制，返回 (保留记录, 被移除记录及原因)"""
+    kept, suppressed_users = limit_user_reports(records, max_reports, window_seconds)
+    kept, suppressed_dups = remove_near_duplicates(kept, threshold, burst_seconds, min_users)
+
+    suppressed = suppressed_users + suppressed_dups
+    suppressed.sort(key=lambda item: item[0][TIMESTAMP])
+    return kept, suppressed
@@ -0,0 +1,337 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+class TDigest:
+    """合并式t-digest分位数草图，内存只与compression有关
+
+    使用k1尺度函数限制质心大小，两端质心更小，因此Q1/Q3等分位点的误差远小于中位数附近。
+    误差上界见 StreamingStats 的说明。
+    """
+
+    def __init__(self, compression=200):
+        self.compression = compression
+        self.means = []
+        self.weights = []
+        self.buffer = []
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.buffer.append(value)
+        if len(self.buffer) >= 10 * self.compression:
+            self._compress()
+
+    def _k(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _k_inverse(self, k):
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+
+    def _compress(self, extra=()):
+        """把缓冲区和其他质心按均值排序后贪心合并"""
+        points = sorted(list(zip(self.means, self.weights))
+                        + [(v, 1) for v in self.buffer] + list(extra))
+        self.buffer = []
+        if not points:
+            return
+
+        self.count = sum(w for _, w in points)
+        self.min = min(self.min, points[0][0])
+        self.max = max(self.max, points[-1][0])
+
+        means = []
+        weights = []
+        cur_mean, cur_weight = points[0]
+        passed = 0.0  # 已输出质心的总权重
+        q_limit = self._k_inverse(self._k(0.0) + 1) * self.count
+
+        for mean, weight in points[1:]:
+            if passed + cur_weight + weight <= q_limit:
+                # 合并到当前质心
+                cur_weight += weight
+                cur_mean += (mean - cur_mean) * weight / cur_weight
+            else:
+                means.append(cur_mean)
+                weights.append(cur_weight)
+                passed += cur_weight
+                q_limit = self._k_inverse(self._k(passed / self.count) + 1) * self.count
+                cur_mean, cur_weight = mean, weight
+
+        means.append(cur_mean)
+        weights.append(cur_weight)
+        self.means, self.weights = means, weights
+
+    def merge(self, other):
+        """合并另一个草图（例如其他分片的结果）"""
+        other._compress()
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(zip(other.means, other.weights))
+
+    def quantile(self, q):
+        """估计分位数，与pandas默认的线性插值定义一致：位置为 q*(n-1)"""
+        self._compress()
+        if not self.means:
+            return math.nan
+        if len(self.means) == 1:
+            return self.means[0]
+
+        # 质心中心在秩轴上的位置为 累计权重 + 权重/2；单点质心与排序后的样本一一对应
+        index = q * (self.count - 1) + 0.5
+        cumulative = 0.0
+        prev_center, prev_mean = 0.0, self.min
+        for mean, weight in zip(self.means, self.weights):
+            center = cumulative + weight / 2
+            if index < center:
+                if center == prev_center:
+                    return mean
+                fraction = (index - prev_center) / (center - prev_center)
+                return prev_mean + fraction * (mean - prev_mean)
+            prev_center, prev_mean = center, mean
+            cumulative += weight
+
+        if index >= self.count - 0.5 or cumulative == prev_center:
+            return self.max if index > prev_center else prev_mean
+        fraction = (index - prev_center) / (self.count - 0.5 - prev_center)
+        return prev_mean + fraction * (self.max - prev_mean)
+
+    def to_dict(self):
+        self._compress()
+        return {'compression': self.compression, 'means': self.means, 'weights': self.weights,
+                'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, state):
+        digest = cls(state['compression'])
+        digest.means = list(state['means'])
+        digest.weights = list(state['weights'])
+        digest.count = sum(digest.weights)
+        digest.min = state['min'] if state['min'] is not None else math.inf
+        digest.max = state['max'] if state['max'] is not None else -math.inf
+        return digest
+
+class Welford:
+    """Welford在线均值/方差，可用Chan公式合并"""
+
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+
+    @property
+    def std(self):
+        """样本标准差（ddof=1，与pandas一致）"""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+class StreamingStats:
+    """单遍统计：t-digest分位数 + Welford均值/标准差，可合并、可序列化以便增量续算
+
+    误差说明：均值和标准差与pandas的精确结果仅有浮点误差。
+    分位数的秩误差不超过 n·π/compression·sqrt(q(1-q))（k1尺度函数下单个质心的最大宽度），
+    compression=200时，Q1/Q3的秩误差不超过样本数的约0.7%；数值误差不超过该秩范围内相邻样本的差值。
+    当 n < compression/π 时所有样本都是单点质心，结果与pandas完全一致。
+    """
+
+    def __init__(self, compression=200):
+        self.digest = TDigest(compression)
+        self.moments = Welford()
+        self.sources = {}  # 已处理的数据文件 -> {'offset': 已读取的字节数, 'digest': 已读内容末尾的校验值}
+
+    def add(self, value):
+        self.digest.add(value)
+        self.moments.add(value)
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other):
+        self.digest.merge(other.digest)
+        self.moments.merge(other.moments)
+        # 同一文件的后续分片读到的位置更靠后，直接覆盖
+        self.sources.update(other.sources)
+        return self
+
+    @property
+    def count(self):
+        return self.moments.count
+
+    def iqr_bounds(self, k=1.5):
+        """IQR规则的上下界"""
+        q1 = self.digest.quantile(0.25)
+        q3 = self.digest.quantile(0.75)
+        iqr = q3 - q1
+        return q1 - k * iqr, q3 + k * iqr
+
+    def zscore_bounds(self, threshold=3):
+        """Z-score规则的上下界（|z|>threshold视为异常）"""
+        mean, std = self.moments.mean, self.moments.std
+        return mean - threshold * std, mean + threshold * std
+
+    def to_dict(self):
+        return {
+            'digest': self.digest.to_dict(),
+            'moments': {'count': self.moments.count, 'mean': self.moments.mean, 'm2': self.moments.m2},
+            'sources': self.sources,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        stats = cls(state['digest']['compression'])
+        stats.digest = TDigest.from_dict(state['digest'])
+        stats.moments = Welford(**state['moments'])
+        stats.sources = {path: {'offset': int(source['offset']), 'digest': str(source['digest'])}
+                         for path, source in dict(state.get('sources', {})).items()}
+        return stats
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+TAIL_BYTES = 256  # 校验已读内容时比对的末尾字节数
+
+def _tail_digest(data_file, offset):
+    """文件前offset字节中最后TAIL_BYTES字节的校验值，用于判断已读部分是否被改写"""
+    with open(data_file, 'rb') as f:
+        f.seek(max(offset - TAIL_BYTES, 0))
+        return hashlib.sha1(f.read(min(offset, TAIL_BYTES))).hexdigest()
+
+def iter_values(data_file, offset=0, end=None):
+    """从offset字节处逐行读取时间序列文件中的数值，不把整个文件读入内存"""
+    with open(data_file, 'rb') as f:
+        f.seek(offset)
+        for raw in f:
+            if end is not None and f.tell() > end:
+                break
+            parts = raw.decode('utf-8').strip().split('\t')
+            if len(parts) >= 2:
+                try:
+                    yield float(parts[1])
+                except ValueError:
+                    continue
+
+def complete_size(data_file):
+    """文件中完整行（以换行结尾）的字节数；末尾未写完的行留到下次再读"""
+    size = os.path.getsize(data_file)
+    with open(data_file, 'rb') as f:
+        f.seek(max(size - 1, 0))
+        if size == 0 or f.read(1) == b'\n':
+            return size
+        # 向前找到最后一个换行
+        position = size
+        while position > 0:
+            start = max(position - 4096, 0)
+            f.seek(start)
+            chunk = f.read(position - start)
+            newline = chunk.rfind(b'\n')
+            if newline >= 0:
+                return start + newline + 1
+            position = start
+        return 0
+
+def resume_offset(data_file, source):
+    """续算的起始字节位置；已读部分被截断或改写时抛出ValueError（草图无法撤销已计入的数据）"""
+    if source is None:
+        return 0
+    offset = source['offset']
+    if os.path.getsize(data_file) < offset or _tail_digest(data_file, offset) != source['digest']:
+        raise ValueError(f"{data_file} 的已处理部分发生了变化，无法在原草图上续算")
+    return offset
+
+def stats_for_file(data_file, compression=200, offset=0):
+    """计算单个分片文件从offset开始的新增部分的统计草图"""
+    end = complete_size(data_file)
+    stats = StreamingStats(compression).update(iter_values(data_file, offset, end))
+    stats.sources[os.path.abspath(data_file)] = {'offset': end, 'digest': _tail_digest(data_file, end)}
+    return stats
+
+def compute_stats(data_files, compression=200, workers=None, state=None):
+    """并行处理多个分片并合并；state为之前保存的草图时只读取各文件新追加的部分"""
+    stats = state or StreamingStats(compression)
+    pending = []
+    for data_file in data_files:
+        source = stats.sources.get(os.path.abspath(data_file))
+        offset = resume_offset(data_file, source)
+        if source is None or complete_size(data_file) > offset:
+            pending.append((data_file, offset))
+
+    if len(pending) == 1 or workers == 1:
+        for data_file, offset in pending:
+            stats.merge(stats_for_file(data_file, compression, offset))
+    elif pending:
+        files, offsets = zip(*pending)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for shard in executor.map(stats_for_file, files, [compression] * len(files), offsets):
+                stats.merge(shard)
+    return stats
+
+def update_stats(data_files, state_file=None, compression=200, workers=None):
+    """读取状态文件续算并保存；状态文件损坏、格式过旧或已处理部分被改写时提示并从头重新计算"""
+    state = None
+    if state_file and os.path.exists(state_file):
+        try:
+            state = StreamingStats.load(state_file)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"状态文件 {state_file} 无法读取 ({e})，重新计算全部数据")
+    try:
+        stats = compute_stats(data_files, compression, workers, state=state)
+    except ValueError as e:
+        print(f"{e}，重新计算全部数据")
+        stats = compute_stats(data_files, compression, workers)
+    if state_file:
+        stats.save(state_file)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description='单遍流式IQR/Z-score统计')
+    parser.add_argument('files', nargs='*', default=['filtered_comments.txt'], help='数据分片文件')
+    parser.add_argument('--state', help='草图状态文件（存在时续算，结束后保存）')
+    parser.add_argument('--compression', type=int, default=200, help='t-digest压缩参数')
+    parser.add_argument('--verify', action='store_true', help='与pandas精确结果对比')
+    args = parser.parse_args()
+
+    stats = update_stats(args.files, args.state, args.compression)
+
+    lower, upper = stats.iqr_bounds()
+    z_lower, z_upper = stats.zscore_bounds()
+    print(f"数据点: {stats.count}, 质心数: {len(stats.digest.means)}")
+    print(f"Q1={stats.digest.quantile(0.25):.3f} Q3={stats.digest.quantile(0.75):.3f}")
+    print(f"IQR范围: {lower:.3f} - {upper:.3f}")
+    print(f"均值={stats.moments.mean:.3f} 标准差={stats.moments.std:.3f}, Z-score范围: {z_lower:.3f} - {z_upper:.3f}")
+
+    if args.verify:
+        import pandas as pd
+
+        values = pd.Series([v for data_file in args.files for v in iter_values(data_file)])
+        print("\npandas精确结果:")
+        print(f"Q1={values.quantile(0.25):.3f} Q3={values.quantile(0.75):.3f} "
+              f"均值={values.mean():.3f} 标准差={values.std():.3f}")
+
+if __name__ == "__main__":
+    main()